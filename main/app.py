@@ -221,11 +221,13 @@ async def load_all_plugins():
         logger.error(f"加载插件时出错: {e}", exc_info=True)
 
 
+# 启动横幅分隔线
+_BANNER_SEPARATOR = "=" * 50
+
+
 async def startup():
     """应用启动"""
-    logger.info("=" * 50)
-    logger.info("🤖 TG-Content-Bot-Pro 启动中...")
-    logger.info("=" * 50)
+    logger.info("%s\n🤖 TG-Content-Bot-Pro 启动中...\n%s", _BANNER_SEPARATOR, _BANNER_SEPARATOR)
     
     # 检查并重置数据库（如果需要）
     check_and_reset_database()
@@ -279,11 +281,10 @@ async def startup():
         logger.error(f"设置机器人命令失败: {e}", exc_info=True)
         logger.warning("机器人命令设置失败，但应用将继续运行")
     
-    logger.info("✅ 部署成功！")
-    logger.info("📱 TG消息提取器已启动")
-    logger.info("🗄️  数据库初始化完成")
-    logger.info("🤖 机器人命令已自动同步...")
-    logger.info("=" * 50)
+    logger.info(
+        "✅ 部署成功！\n📱 TG消息提取器已启动\n🗄️  数据库初始化完成\n🤖 机器人命令已自动同步...\n%s",
+        _BANNER_SEPARATOR
+    )
 
 
 async def shutdown():
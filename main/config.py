@@ -30,6 +30,8 @@ class Settings:
     def __init__(self) -> None:
         """初始化配置管理器"""
         self._validated: bool = False
+        # 授权用户解析缓存：(AUTH原始值, 解析结果)，AUTH变更时自动失效
+        self._auth_users_cache: Optional[tuple] = None
         self._load_settings()
         self._validate_settings()
     
@@ -252,14 +254,24 @@ class Settings:
     def get_auth_users(self) -> List[int]:
         """获取授权用户列表
         
+        解析结果按 AUTH 原始值缓存，AUTH 变更后自动重新解析。
+        
         Returns:
             授权用户ID列表
         """
+        auth = self.AUTH
+        cached = self._auth_users_cache
+        if cached is not None and cached[0] == auth:
+            return list(cached[1])
+        
         # AUTH 可能是单个用户ID或逗号分隔的多个用户ID
-        if isinstance(self.AUTH, str):
-            return [int(uid.strip()) for uid in self.AUTH.split(",") if uid.strip()]
+        if isinstance(auth, str):
+            auth_users = [int(uid.strip()) for uid in auth.split(",") if uid.strip()]
         else:
-            return [self.AUTH]
+            auth_users = [auth]
+        
+        self._auth_users_cache = (auth, auth_users)
+        return list(auth_users)
     
     def is_user_authorized(self, user_id: int) -> bool:
         """检查用户是否被授权
@@ -53,13 +53,18 @@ class PluginManager:
             return list(self.plugin_infos.keys())
         
         plugins = []
-        plugins_dir_path = Path(self.plugins_dir)
-        if plugins_dir_path.exists():
-            for file_path in plugins_dir_path.glob("*.py"):
-                if file_path.name != "__init__.py":
-                    plugin_name = file_path.stem
+        try:
+            # scandir 的 DirEntry 复用读取目录时得到的文件类型，无需逐个 stat
+            with os.scandir(self.plugins_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if not name.endswith(".py") or name == "__init__.py" or not entry.is_file():
+                        continue
+                    plugin_name = name[:-3]
                     plugins.append(plugin_name)
-                    self.plugin_infos[plugin_name] = PluginInfo(plugin_name, file_path)
+                    self.plugin_infos[plugin_name] = PluginInfo(plugin_name, Path(entry.path))
+        except FileNotFoundError:
+            pass
         
         self._discovered = True
         return plugins
@@ -68,7 +73,7 @@ class PluginManager:
         """加载单个插件"""
         try:
             if plugin_name in self.loaded_plugins:
-                logger.debug(f"插件已加载: {plugin_name}")
+                logger.debug("插件已加载: %s", plugin_name)
                 return True
             
             # 检查插件是否存在
@@ -76,14 +81,14 @@ class PluginManager:
                 # 尝试发现插件
                 self.discover_plugins()
                 if plugin_name not in self.plugin_infos:
-                    logger.error(f"插件不存在: {plugin_name}")
+                    logger.error("插件不存在: %s", plugin_name)
                     return False
             
             plugin_info = self.plugin_infos[plugin_name]
             
             # 检查依赖
             if not self._check_dependencies(plugin_name):
-                logger.error(f"插件 {plugin_name} 依赖检查失败")
+                logger.error("插件 %s 依赖检查失败", plugin_name)
                 return False
             
             # 加载插件
@@ -98,10 +103,11 @@ class PluginManager:
             plugin_info.load_error = None
             
             self.loaded_plugins.append(plugin_name)
-            logger.info(f"成功加载插件: {plugin_name}")
+            # 逐个插件的成功信息降为 debug，加载结果由调用方汇总输出
+            logger.debug("成功加载插件: %s", plugin_name)
             return True
         except Exception as e:
-            logger.error(f"加载插件失败 {plugin_name}: {e}")
+            logger.error("加载插件失败 %s: %s", plugin_name, e)
             if plugin_name in self.plugin_infos:
                 self.plugin_infos[plugin_name].state = PluginState.ERROR
                 self.plugin_infos[plugin_name].load_error = str(e)
@@ -128,7 +134,7 @@ class PluginManager:
         results = {}
         plugin_names = self.discover_plugins()
         
-        logger.info(f"发现 {len(plugin_names)} 个插件: {', '.join(plugin_names)}")
+        logger.info("发现 %s 个插件: %s", len(plugin_names), ', '.join(plugin_names))
         
         for plugin_name in plugin_names:
             results[plugin_name] = self.load_plugin(plugin_name)
@@ -157,16 +163,16 @@ class PluginManager:
                     if mod_name.startswith(f"{module_name}."):
                         del sys.modules[mod_name]
             
-            logger.info(f"成功卸载插件: {plugin_name}")
+            logger.info("成功卸载插件: %s", plugin_name)
             return True
         except Exception as e:
-            logger.error(f"卸载插件失败 {plugin_name}: {e}")
+            logger.error("卸载插件失败 %s: %s", plugin_name, e)
             return False
     
     def reload_plugin(self, plugin_name: str) -> bool:
         """重新加载插件"""
         try:
-            logger.info(f"开始重新加载插件: {plugin_name}")
+            logger.info("开始重新加载插件: %s", plugin_name)
             
             # 先卸载插件
             self.unload_plugin(plugin_name)
@@ -175,13 +181,13 @@ class PluginManager:
             success = self.load_plugin(plugin_name)
             
             if success:
-                logger.info(f"成功重新加载插件: {plugin_name}")
+                logger.info("成功重新加载插件: %s", plugin_name)
             else:
-                logger.error(f"重新加载插件失败: {plugin_name}")
+                logger.error("重新加载插件失败: %s", plugin_name)
             
             return success
         except Exception as e:
-            logger.error(f"重新加载插件失败 {plugin_name}: {e}")
+            logger.error("重新加载插件失败 %s: %s", plugin_name, e)
             return False
     
     def reload_all_plugins(self) -> Dict[str, bool]:
@@ -189,7 +195,7 @@ class PluginManager:
         results = {}
         loaded_plugins = self.loaded_plugins.copy()
         
-        logger.info(f"开始重新加载 {len(loaded_plugins)} 个插件")
+        logger.info("开始重新加载 %s 个插件", len(loaded_plugins))
         
         # 先卸载所有插件
         for plugin_name in loaded_plugins:
@@ -199,7 +205,8 @@ class PluginManager:
         for plugin_name in loaded_plugins:
             results[plugin_name] = self.load_plugin(plugin_name)
         
-        logger.info(f"重新加载完成，成功: {sum(results.values())}, 失败: {len(results) - sum(results.values())}")
+        succeeded = sum(results.values())
+        logger.info("重新加载完成，成功: %s, 失败: %s", succeeded, len(results) - succeeded)
         return results
     
     def get_plugin(self, plugin_name: str) -> Optional[Any]:
@@ -85,7 +85,7 @@ class StartPlugin(BasePlugin):
                 if file_manager.file_exists(user_thumb):
                     file_manager.safe_remove(user_thumb)
                 
-                file_manager.move_file(path, user_thumb)
+                await file_manager.move_file_async(path, user_thumb)
                 await t.edit("✅ 缩略图已保存！")
                 
             except TimeoutError:
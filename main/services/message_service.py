@@ -190,9 +190,11 @@ class MessageService:
     async def _cleanup_file(self, file_path: str) -> bool:
         """清理临时文件"""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"临时文件已清理: {file_path}")
+            # 直接删除，文件不存在视为已清理，省去一次 stat
+            os.remove(file_path)
+            logger.info(f"临时文件已清理: {file_path}")
+            return True
+        except FileNotFoundError:
             return True
         except Exception as e:
             logger.warning(f"清理临时文件失败 {file_path}: {e}")
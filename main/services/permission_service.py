@@ -1,17 +1,72 @@
 """权限管理服务"""
 import logging
-from typing import List, Optional
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from ..config import settings
 from .user_service import user_service
 
 logger = logging.getLogger(__name__)
 
+# 权限检查结果缓存的有效期（秒）和容量上限
+_PERM_CACHE_TTL = 30.0
+_PERM_CACHE_MAX_SIZE = 4096
+
 
 class PermissionService:
     """权限管理服务"""
     
     def __init__(self):
         self._owner_ids = None
+        self._version = 0
+        # 权限检查结果缓存：(权限级别, 用户ID) -> (检查时间, 权限版本, 是否有权限)
+        self._perm_cache: Dict[Tuple[str, int], Tuple[float, int, bool]] = {}
+    
+    @property
+    def version(self) -> int:
+        """权限数据版本，所有者列表或用户授权状态变更后递增"""
+        return self._version
+    
+    def bump_version(self) -> None:
+        """所有者列表或用户授权状态变更后调用，重新解析所有者并使权限缓存失效"""
+        self._owner_ids = None
+        self._version += 1
+    
+    async def _cached_check(self, permission_level: str, user_id: int,
+                            check: Callable[[int], Awaitable[bool]]) -> bool:
+        """执行权限检查，结果缓存 _PERM_CACHE_TTL 秒
+        
+        权限数据版本变化时缓存自动失效。
+        
+        Args:
+            permission_level: 权限级别
+            user_id: 用户ID
+            check: 实际的检查函数
+            
+        Returns:
+            bool: 是否有权限
+        """
+        key = (permission_level, user_id)
+        now = time.monotonic()
+        # 在检查前读取版本：检查期间发生变更时，写入的缓存项会立即失效
+        version = self._version
+        
+        cached = self._perm_cache.get(key)
+        if cached is not None and cached[1] == version and now - cached[0] < _PERM_CACHE_TTL:
+            return cached[2]
+        
+        has_permission = await check(user_id)
+        
+        cache = self._perm_cache
+        if len(cache) >= _PERM_CACHE_MAX_SIZE:
+            # 清理过期或版本不一致的缓存项
+            for stale_key in [k for k, (ts, ver, _) in cache.items()
+                              if ver != self._version or now - ts >= _PERM_CACHE_TTL]:
+                del cache[stale_key]
+            if len(cache) >= _PERM_CACHE_MAX_SIZE:
+                cache.clear()
+        
+        cache[key] = (now, version, has_permission)
+        return has_permission
     
     def _get_owner_ids(self) -> List[int]:
         """获取所有者ID列表"""
@@ -46,11 +101,11 @@ class PermissionService:
     
     async def require_owner(self, user_id: int) -> bool:
         """要求用户必须是所有者，否则返回False"""
-        return await self.is_owner(user_id)
+        return await self._cached_check("owner", user_id, self.is_owner)
     
     async def require_authorized(self, user_id: int) -> bool:
         """要求用户必须被授权，否则返回False"""
-        return await self.is_user_authorized(user_id)
+        return await self._cached_check("authorized", user_id, self.is_user_authorized)
     
     async def get_permission_level(self, user_id: int) -> str:
         """获取用户的权限级别"""
@@ -6,6 +6,13 @@ from ..core.database import db_manager
 logger = logging.getLogger(__name__)
 
 
+def _invalidate_permissions() -> None:
+    """授权状态变更后使权限检查缓存失效"""
+    # 延迟导入：permission_service 在模块级依赖 user_service
+    from .permission_service import permission_service
+    permission_service.bump_version()
+
+
 class UserService:
     """用户管理服务"""
     
@@ -16,7 +23,11 @@ class UserService:
                       first_name: Optional[str] = None, last_name: Optional[str] = None,
                       is_authorized: bool = False) -> bool:
         """添加或更新用户"""
-        return await self.db.add_user(user_id, username, first_name, last_name, is_authorized)
+        result = await self.db.add_user(user_id, username, first_name, last_name, is_authorized)
+        if is_authorized:
+            # 新用户以授权状态插入
+            _invalidate_permissions()
+        return result
     
     async def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
         """获取用户信息"""
@@ -52,11 +63,15 @@ class UserService:
     
     async def authorize_user(self, user_id: int) -> bool:
         """授权用户"""
-        return await self.db.authorize_user(user_id)
+        result = await self.db.authorize_user(user_id)
+        _invalidate_permissions()
+        return result
     
     async def unauthorize_user(self, user_id: int) -> bool:
         """取消用户授权"""
-        return await self.db.unauthorize_user(user_id)
+        result = await self.db.unauthorize_user(user_id)
+        _invalidate_permissions()
+        return result
     
     async def is_user_authorized(self, user_id: int) -> bool:
         """检查用户是否被授权"""
@@ -5,21 +5,83 @@
 import os
 import re
 import logging
-from typing import Dict, Any, List, Optional
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from ..config import settings, ConfigError
 
 logger = logging.getLogger(__name__)
 
+# 验证消息以 (模板, 参数) 形式暂存，仅在需要输出时才格式化
+_Message = Tuple[str, tuple]
+
+
+def _format_messages(messages: List[_Message]) -> List[str]:
+    """将暂存的 (模板, 参数) 消息格式化为字符串列表"""
+    return [template % args if args else template for template, args in messages]
+
+
+# 配置模板（只读），仅在导入时构建一次
+_CONFIG_TEMPLATE = MappingProxyType({
+    # 必需配置项
+    "API_ID": "your_api_id_here",  # 从 my.telegram.org 获取
+    "API_HASH": "your_api_hash_here",  # 从 my.telegram.org 获取
+    "BOT_TOKEN": "your_bot_token_here",  # 从 @BotFather 获取
+    "AUTH": "your_user_id_here",  # 从 @userinfobot 获取，支持多个ID逗号分隔
+    "MONGO_DB": "your_mongodb_connection_string",  # MongoDB连接字符串
+    
+    # 可选配置项
+    "SESSION": "",  # Pyrogram会话字符串
+    "FORCESUB": "",  # 强制订阅频道（不含@）
+    "ENCRYPTION_KEY": "",  # 加密密钥，可选
+    
+    # 环境配置
+    "ENVIRONMENT": "production",  # development, testing, production
+    "LOG_LEVEL": "INFO",  # DEBUG, INFO, WARNING, ERROR, CRITICAL
+    
+    # 性能配置
+    "MAX_WORKERS": 3,  # 工作线程数（1-20）
+    "MIN_CONCURRENCY": 1,  # 最小并发数
+    "MAX_CONCURRENCY": 15,  # 最大并发数
+    "CHUNK_SIZE": 524288,  # 分块大小（1-50MB）
+    "MAX_RETRIES": 3,  # 最大重试次数（1-10）
+    "RETRY_DELAY": 1.0,  # 重试延迟（秒）
+    "CONNECT_TIMEOUT": 30,  # 连接超时（秒）
+    "READ_TIMEOUT": 60,  # 读取超时（秒）
+    
+    # 流量限制配置
+    "DEFAULT_DAILY_LIMIT": 1073741824,  # 默认每日流量限制（字节，1GB）
+    "DEFAULT_MONTHLY_LIMIT": 10737418240,  # 默认每月流量限制（字节，10GB）
+    "DEFAULT_PER_FILE_LIMIT": 104857600,  # 默认单文件限制（字节，100MB）
+    
+    # 健康检查配置
+    "HEALTH_CHECK_PORT": 8089  # 健康检查端口（1024-65535）
+})
+
+
+def _is_mongo_uri(value: str) -> bool:
+    """检查是否为 mongodb:// 或 mongodb+srv:// 开头的连接字符串"""
+    return value.startswith('mongodb://') or value.startswith('mongodb+srv://')
+
 
 class ConfigValidator:
     """配置验证器类"""
     
+    __slots__ = ('errors', 'warnings')
+    
     def __init__(self):
         """初始化配置验证器"""
-        self.errors: List[str] = []
-        self.warnings: List[str] = []
+        self.errors: List[_Message] = []
+        self.warnings: List[_Message] = []
+    
+    def _add_error(self, template: str, *args: Any) -> None:
+        """记录错误，格式化延迟到输出时进行"""
+        self.errors.append((template, args))
+    
+    def _add_warning(self, template: str, *args: Any) -> None:
+        """记录警告，格式化延迟到输出时进行"""
+        self.warnings.append((template, args))
     
     def validate_all(self) -> bool:
         """验证所有配置项
@@ -41,13 +103,13 @@ class ConfigValidator:
         # 记录验证结果
         if self.errors:
             logger.error("配置验证失败，发现 %d 个错误", len(self.errors))
-            for error in self.errors:
-                logger.error("  • %s", error)
+            for template, args in self.errors:
+                logger.error("  • " + template, *args)
         
         if self.warnings:
             logger.warning("配置验证发现 %d 个警告", len(self.warnings))
-            for warning in self.warnings:
-                logger.warning("  • %s", warning)
+            for template, args in self.warnings:
+                logger.warning("  • " + template, *args)
         
         return len(self.errors) == 0
     
@@ -55,144 +117,147 @@ class ConfigValidator:
         """验证Telegram相关配置"""
         # API_ID验证
         if not settings.API_ID:
-            self.errors.append("API_ID 不能为空")
+            self._add_error("API_ID 不能为空")
         elif not isinstance(settings.API_ID, int) or settings.API_ID <= 0:
-            self.errors.append("API_ID 必须为正整数")
+            self._add_error("API_ID 必须为正整数")
         
         # API_HASH验证
         if not settings.API_HASH:
-            self.errors.append("API_HASH 不能为空")
+            self._add_error("API_HASH 不能为空")
         elif len(settings.API_HASH) != 32:
-            self.errors.append(f"API_HASH 长度必须为32位，当前为 {len(settings.API_HASH)} 位")
+            self._add_error("API_HASH 长度必须为32位，当前为 %d 位", len(settings.API_HASH))
         elif not settings.API_HASH.isalnum():
-            self.errors.append("API_HASH 必须为字母数字组合")
+            self._add_error("API_HASH 必须为字母数字组合")
         
         # BOT_TOKEN验证
         if not settings.BOT_TOKEN:
-            self.errors.append("BOT_TOKEN 不能为空")
+            self._add_error("BOT_TOKEN 不能为空")
         elif not re.match(r'^\d+:[A-Za-z0-9_-]+$', settings.BOT_TOKEN):
-            self.errors.append("BOT_TOKEN 格式无效，应为 '数字:字符串' 格式，例如：1234567890:ABCdefGhIJKLMNOPqrstUVwXYz123456")
+            self._add_error("BOT_TOKEN 格式无效，应为 '数字:字符串' 格式，例如：1234567890:ABCdefGhIJKLMNOPqrstUVwXYz123456")
         
         # AUTH验证
         if not settings.AUTH:
-            self.errors.append("AUTH 不能为空")
+            self._add_error("AUTH 不能为空")
         else:
             try:
                 auth_users = settings.get_auth_users()
                 if not auth_users:
-                    self.errors.append("AUTH 必须包含有效的用户ID")
+                    self._add_error("AUTH 必须包含有效的用户ID")
                 for user_id in auth_users:
                     if not isinstance(user_id, int) or user_id <= 0:
-                        self.errors.append(f"AUTH 中的用户ID {user_id} 无效，必须是正整数")
+                        self._add_error("AUTH 中的用户ID %s 无效，必须是正整数", user_id)
             except (ValueError, TypeError) as e:
-                self.errors.append(f"AUTH 格式无效: {e}。正确格式应为：单个用户ID或逗号分隔的多个用户ID，例如：1234567890 或 1234567890,9876543210")
+                self._add_error("AUTH 格式无效: %s。正确格式应为：单个用户ID或逗号分隔的多个用户ID，例如：1234567890 或 1234567890,9876543210", e)
         
         # FORCESUB验证（可选）
         if hasattr(settings, 'FORCESUB') and settings.FORCESUB:
             # 检查FORCESUB格式，应为不含@的用户名
             if settings.FORCESUB.startswith('@'):
-                self.warnings.append("FORCESUB 不应包含@符号，应为纯用户名")
+                self._add_warning("FORCESUB 不应包含@符号，应为纯用户名")
             elif not re.match(r'^[a-zA-Z0-9_]+$', settings.FORCESUB):
-                self.warnings.append("FORCESUB 格式无效，应为有效的Telegram用户名")
+                self._add_warning("FORCESUB 格式无效，应为有效的Telegram用户名")
     
     def _validate_database_config(self) -> None:
         """验证数据库配置"""
         if not settings.MONGO_DB:
-            self.errors.append("MONGO_DB 不能为空")
+            self._add_error("MONGO_DB 不能为空")
             return
         
         # 验证MongoDB连接字符串格式
-        if not settings.MONGO_DB.startswith(('mongodb://', 'mongodb+srv://')):
-            self.errors.append("MONGO_DB 必须是有效的MongoDB连接字符串，以 mongodb:// 或 mongodb+srv:// 开头")
+        if not _is_mongo_uri(settings.MONGO_DB):
+            self._add_error("MONGO_DB 必须是有效的MongoDB连接字符串，以 mongodb:// 或 mongodb+srv:// 开头")
         
         # 尝试解析连接字符串
         try:
             parsed = urlparse(settings.MONGO_DB)
             if not parsed.netloc:
-                self.errors.append("MONGO_DB 连接字符串格式错误，无法解析主机名")
+                self._add_error("MONGO_DB 连接字符串格式错误，无法解析主机名")
         except Exception as e:
-            self.errors.append(f"MONGO_DB 连接字符串解析失败: {e}")
+            self._add_error("MONGO_DB 连接字符串解析失败: %s", e)
     
     def _validate_performance_config(self) -> None:
         """验证性能相关配置"""
         # 并发配置验证
-        if settings.MAX_WORKERS <= 0 or settings.MAX_WORKERS > 20:
-            self.errors.append(f"MAX_WORKERS 必须在1-20之间，当前为 {settings.MAX_WORKERS}")
+        max_workers = settings.MAX_WORKERS
+        if not 1 <= max_workers <= 20:
+            self._add_error("MAX_WORKERS 必须在1-20之间，当前为 %s", max_workers)
         
         if settings.MIN_CONCURRENCY <= 0:
-            self.errors.append(f"MIN_CONCURRENCY 必须大于0，当前为 {settings.MIN_CONCURRENCY}")
+            self._add_error("MIN_CONCURRENCY 必须大于0，当前为 %s", settings.MIN_CONCURRENCY)
         
         if settings.MAX_CONCURRENCY < settings.MIN_CONCURRENCY:
-            self.errors.append(f"MAX_CONCURRENCY ({settings.MAX_CONCURRENCY}) 不能小于 MIN_CONCURRENCY ({settings.MIN_CONCURRENCY})")
+            self._add_error("MAX_CONCURRENCY (%s) 不能小于 MIN_CONCURRENCY (%s)", settings.MAX_CONCURRENCY, settings.MIN_CONCURRENCY)
         
         if settings.MAX_CONCURRENCY > 50:
-            self.warnings.append(f"MAX_CONCURRENCY ({settings.MAX_CONCURRENCY}) 过高，可能导致性能问题，建议不超过50")
+            self._add_warning("MAX_CONCURRENCY (%s) 过高，可能导致性能问题，建议不超过50", settings.MAX_CONCURRENCY)
         
         # 分块大小验证
-        if settings.CHUNK_SIZE <= 0 or settings.CHUNK_SIZE > 50*1024*1024:
-            self.errors.append(f"CHUNK_SIZE 必须在1字节到50MB之间，当前为 {settings.CHUNK_SIZE} 字节")
-        elif settings.CHUNK_SIZE < 64*1024:
-            self.warnings.append(f"CHUNK_SIZE 过小，建议至少64KB，当前为 {settings.CHUNK_SIZE} 字节")
+        chunk_size = settings.CHUNK_SIZE
+        if not 1 <= chunk_size <= 50*1024*1024:
+            self._add_error("CHUNK_SIZE 必须在1字节到50MB之间，当前为 %s 字节", chunk_size)
+        elif chunk_size < 64*1024:
+            self._add_warning("CHUNK_SIZE 过小，建议至少64KB，当前为 %s 字节", chunk_size)
         
         # 重试配置验证
-        if settings.MAX_RETRIES <= 0 or settings.MAX_RETRIES > 10:
-            self.errors.append(f"MAX_RETRIES 必须在1-10之间，当前为 {settings.MAX_RETRIES}")
+        max_retries = settings.MAX_RETRIES
+        if not 1 <= max_retries <= 10:
+            self._add_error("MAX_RETRIES 必须在1-10之间，当前为 %s", max_retries)
         
         if settings.RETRY_DELAY <= 0:
-            self.errors.append(f"RETRY_DELAY 必须大于0，当前为 {settings.RETRY_DELAY}")
+            self._add_error("RETRY_DELAY 必须大于0，当前为 %s", settings.RETRY_DELAY)
         elif settings.RETRY_DELAY < 0.5:
-            self.warnings.append(f"RETRY_DELAY 过小，建议至少0.5秒，当前为 {settings.RETRY_DELAY} 秒")
+            self._add_warning("RETRY_DELAY 过小，建议至少0.5秒，当前为 %s 秒", settings.RETRY_DELAY)
         
         # 超时配置验证
         if settings.CONNECT_TIMEOUT <= 0:
-            self.errors.append(f"CONNECT_TIMEOUT 必须大于0，当前为 {settings.CONNECT_TIMEOUT}")
+            self._add_error("CONNECT_TIMEOUT 必须大于0，当前为 %s", settings.CONNECT_TIMEOUT)
         elif settings.CONNECT_TIMEOUT < 10:
-            self.warnings.append(f"CONNECT_TIMEOUT 过小，建议至少10秒，当前为 {settings.CONNECT_TIMEOUT} 秒")
+            self._add_warning("CONNECT_TIMEOUT 过小，建议至少10秒，当前为 %s 秒", settings.CONNECT_TIMEOUT)
         
         if settings.READ_TIMEOUT <= 0:
-            self.errors.append(f"READ_TIMEOUT 必须大于0，当前为 {settings.READ_TIMEOUT}")
+            self._add_error("READ_TIMEOUT 必须大于0，当前为 %s", settings.READ_TIMEOUT)
         elif settings.READ_TIMEOUT < 30:
-            self.warnings.append(f"READ_TIMEOUT 过小，建议至少30秒，当前为 {settings.READ_TIMEOUT} 秒")
+            self._add_warning("READ_TIMEOUT 过小，建议至少30秒，当前为 %s 秒", settings.READ_TIMEOUT)
     
     def _validate_security_config(self) -> None:
         """验证安全相关配置"""
         # 流量限制验证
         if settings.DEFAULT_DAILY_LIMIT < 0:
-            self.errors.append("DEFAULT_DAILY_LIMIT 不能为负数")
+            self._add_error("DEFAULT_DAILY_LIMIT 不能为负数")
         
         if settings.DEFAULT_MONTHLY_LIMIT < 0:
-            self.errors.append("DEFAULT_MONTHLY_LIMIT 不能为负数")
+            self._add_error("DEFAULT_MONTHLY_LIMIT 不能为负数")
         
         if settings.DEFAULT_PER_FILE_LIMIT < 0:
-            self.errors.append("DEFAULT_PER_FILE_LIMIT 不能为负数")
+            self._add_error("DEFAULT_PER_FILE_LIMIT 不能为负数")
         
         # 加密密钥验证（如果存在）
         if settings.ENCRYPTION_KEY:
             key_length = len(settings.ENCRYPTION_KEY)
             if key_length < 3:
-                self.errors.append(f"ENCRYPTION_KEY 长度过短，必须在3-128个字符之间，当前为 {key_length} 位")
+                self._add_error("ENCRYPTION_KEY 长度过短，必须在3-128个字符之间，当前为 %d 位", key_length)
             elif key_length > 128:
-                self.errors.append(f"ENCRYPTION_KEY 长度过长，必须在3-128个字符之间，当前为 {key_length} 位")
+                self._add_error("ENCRYPTION_KEY 长度过长，必须在3-128个字符之间，当前为 %d 位", key_length)
             elif key_length < 16:
-                self.warnings.append(f"ENCRYPTION_KEY 长度较短（{key_length} 位），建议至少16位以提高安全性")
+                self._add_warning("ENCRYPTION_KEY 长度较短（%d 位），建议至少16位以提高安全性", key_length)
             elif key_length < 32:
-                self.warnings.append(f"ENCRYPTION_KEY 长度建议至少32位以提高安全性，当前为 {key_length} 位")
+                self._add_warning("ENCRYPTION_KEY 长度建议至少32位以提高安全性，当前为 %d 位", key_length)
     
     def _validate_environment_config(self) -> None:
         """验证环境相关配置"""
         # 环境验证
         if settings.ENVIRONMENT not in ['development', 'testing', 'production']:
-            self.errors.append(f"ENVIRONMENT 必须是 development、testing 或 production，当前为 {settings.ENVIRONMENT}")
+            self._add_error("ENVIRONMENT 必须是 development、testing 或 production，当前为 %s", settings.ENVIRONMENT)
         
         # 日志级别验证
         valid_log_levels = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
         log_level_upper = settings.LOG_LEVEL.upper()
         if log_level_upper not in valid_log_levels:
-            self.errors.append(f"LOG_LEVEL 必须是 {', '.join(valid_log_levels)} 之一，当前为 {settings.LOG_LEVEL}")
+            self._add_error("LOG_LEVEL 必须是 %s 之一，当前为 %s", ', '.join(valid_log_levels), settings.LOG_LEVEL)
         
         # 健康检查端口验证
         if not (1024 <= settings.HEALTH_CHECK_PORT <= 65535):
-            self.errors.append(f"HEALTH_CHECK_PORT 必须在1024-65535之间，当前为 {settings.HEALTH_CHECK_PORT}")
+            self._add_error("HEALTH_CHECK_PORT 必须在1024-65535之间，当前为 %s", settings.HEALTH_CHECK_PORT)
     
     def _validate_additional_config(self) -> None:
         """验证其他配置项"""
@@ -200,7 +265,7 @@ class ConfigValidator:
         if hasattr(settings, 'SESSION') and settings.SESSION:
             # 简单验证SESSION长度
             if len(settings.SESSION) < 50:
-                self.warnings.append("SESSION 长度过短，可能无效")
+                self._add_warning("SESSION 长度过短，可能无效")
     
     def get_validation_report(self) -> Dict[str, Any]:
         """获取验证报告
@@ -210,8 +275,8 @@ class ConfigValidator:
         """
         return {
             "valid": len(self.errors) == 0,
-            "errors": self.errors.copy(),
-            "warnings": self.warnings.copy(),
+            "errors": _format_messages(self.errors),
+            "warnings": _format_messages(self.warnings),
             "error_count": len(self.errors),
             "warning_count": len(self.warnings)
         }
@@ -222,41 +287,7 @@ class ConfigValidator:
         Returns:
             配置模板字典
         """
-        return {
-            # 必需配置项
-            "API_ID": "your_api_id_here",  # 从 my.telegram.org 获取
-            "API_HASH": "your_api_hash_here",  # 从 my.telegram.org 获取
-            "BOT_TOKEN": "your_bot_token_here",  # 从 @BotFather 获取
-            "AUTH": "your_user_id_here",  # 从 @userinfobot 获取，支持多个ID逗号分隔
-            "MONGO_DB": "your_mongodb_connection_string",  # MongoDB连接字符串
-            
-            # 可选配置项
-            "SESSION": "",  # Pyrogram会话字符串
-            "FORCESUB": "",  # 强制订阅频道（不含@）
-            "ENCRYPTION_KEY": "",  # 加密密钥，可选
-            
-            # 环境配置
-            "ENVIRONMENT": "production",  # development, testing, production
-            "LOG_LEVEL": "INFO",  # DEBUG, INFO, WARNING, ERROR, CRITICAL
-            
-            # 性能配置
-            "MAX_WORKERS": 3,  # 工作线程数（1-20）
-            "MIN_CONCURRENCY": 1,  # 最小并发数
-            "MAX_CONCURRENCY": 15,  # 最大并发数
-            "CHUNK_SIZE": 524288,  # 分块大小（1-50MB）
-            "MAX_RETRIES": 3,  # 最大重试次数（1-10）
-            "RETRY_DELAY": 1.0,  # 重试延迟（秒）
-            "CONNECT_TIMEOUT": 30,  # 连接超时（秒）
-            "READ_TIMEOUT": 60,  # 读取超时（秒）
-            
-            # 流量限制配置
-            "DEFAULT_DAILY_LIMIT": 1073741824,  # 默认每日流量限制（字节，1GB）
-            "DEFAULT_MONTHLY_LIMIT": 10737418240,  # 默认每月流量限制（字节，10GB）
-            "DEFAULT_PER_FILE_LIMIT": 104857600,  # 默认单文件限制（字节，100MB）
-            
-            # 健康检查配置
-            "HEALTH_CHECK_PORT": 8089  # 健康检查端口（1024-65535）
-        }
+        return dict(_CONFIG_TEMPLATE)
     
     def generate_env_file_template(self) -> str:
         """生成.env文件模板
@@ -266,14 +297,7 @@ class ConfigValidator:
         """
         template = "# TG-Content-Bot-Pro 配置文件\n# 请根据实际情况修改以下配置\n\n"
         
-        config_template = self.generate_config_template()
-        for key, value in config_template.items():
-            if isinstance(value, str) and 'your_' in value:
-                template += f"{key}={value}\n"
-            else:
-                template += f"{key}={value}\n"
-        
-        return template
+        return template + "".join(f"{key}={value}\n" for key, value in _CONFIG_TEMPLATE.items())
 
 
 def ensure_config_integrity() -> bool:
@@ -283,7 +307,8 @@ def ensure_config_integrity() -> bool:
         True表示配置完整且正确，False表示存在问题
     """
     try:
-        validator = ConfigValidator()
+        # 复用全局验证器实例，validate_all 会清空上一次的结果
+        validator = config_validator
         is_valid = validator.validate_all()
         
         if not is_valid:
@@ -293,8 +318,7 @@ def ensure_config_integrity() -> bool:
             # 如果是在开发环境，提供更详细的帮助信息
             if not settings.is_production():
                 logger.info("配置模板参考:")
-                template = validator.generate_config_template()
-                for key, value in template.items():
+                for key, value in _CONFIG_TEMPLATE.items():
                     logger.info("  %s=%s", key, value)
         
         return is_valid
@@ -319,7 +343,7 @@ def validate_specific_config(config_key: str, config_value: Any) -> bool:
         "API_HASH": lambda v: isinstance(v, str) and len(v) == 32 and v.isalnum(),
         "BOT_TOKEN": lambda v: isinstance(v, str) and bool(re.match(r'^\d+:[A-Za-z0-9_-]+$', v)),
         "AUTH": lambda v: bool(v) and isinstance(v, (int, str)),
-        "MONGO_DB": lambda v: isinstance(v, str) and v.startswith(('mongodb://', 'mongodb+srv://')),
+        "MONGO_DB": lambda v: isinstance(v, str) and _is_mongo_uri(v),
         "ENVIRONMENT": lambda v: v in ['development', 'testing', 'production'],
         "LOG_LEVEL": lambda v: v.upper() in ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
         "HEALTH_CHECK_PORT": lambda v: isinstance(v, int) and 1024 <= v <= 65535,
@@ -3,10 +3,13 @@
 提供统一的错误处理机制，包括异常捕获、日志记录和错误恢复。
 """
 import logging
-import traceback
 import asyncio
-from typing import Any, Callable, Optional, Dict, Type
-from functools import wraps
+import random
+import threading
+import time
+from typing import Any, Callable, Optional, Dict, Type, Deque, Tuple
+from collections import OrderedDict, deque
+from functools import lru_cache, wraps
 from datetime import datetime, timedelta
 
 from ..config import settings
@@ -14,15 +17,86 @@ from ..config import settings
 logger = logging.getLogger(__name__)
 
 
+# 网络相关错误（精确类型匹配），建议重试
+_NETWORK_ERROR_TYPES = (ConnectionError, TimeoutError, asyncio.TimeoutError)
+# 可能属于认证错误的类型（精确类型匹配，还需检查错误信息）
+_AUTH_ERROR_TYPES = (PermissionError, ValueError)
+
+# 错误类别
+_KIND_NETWORK = "network"
+_KIND_AUTH = "auth"
+_KIND_OTHER = "other"
+
+
+@lru_cache(maxsize=64)
+def _classify_error(error_cls: type) -> Tuple[str, int, str]:
+    """按异常类型计算并缓存 (类型名, 日志级别, 错误类别)"""
+    level = logging.WARNING if issubclass(error_cls, (ConnectionError, TimeoutError)) else logging.ERROR
+    
+    if error_cls in _NETWORK_ERROR_TYPES:
+        kind = _KIND_NETWORK
+    elif error_cls in _AUTH_ERROR_TYPES:
+        kind = _KIND_AUTH
+    else:
+        kind = _KIND_OTHER
+    
+    return error_cls.__name__, level, kind
+
+
+class BoundedSet:
+    """容量有限的有序集合，超出容量时淘汰最早加入的元素"""
+    
+    __slots__ = ('maxlen', '_items')
+    
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self._items: "OrderedDict[Any, None]" = OrderedDict()
+    
+    def add(self, item: Any) -> None:
+        """添加元素，已存在时移到最新位置"""
+        items = self._items
+        if item in items:
+            items.move_to_end(item)
+            return
+        items[item] = None
+        if len(items) > self.maxlen:
+            items.popitem(last=False)
+    
+    def __contains__(self, item: Any) -> bool:
+        return item in self._items
+    
+    def __iter__(self):
+        return iter(self._items)
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __repr__(self) -> str:
+        return f"BoundedSet({list(self._items)!r}, maxlen={self.maxlen})"
+
+
+# 每种错误类型最多保留的上下文/用户ID数量
+_MAX_ERROR_CONTEXTS = 128
+_MAX_ERROR_USER_IDS = 1024
+
+
+def _monotonic_to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    """将 time.monotonic() 时间戳换算为当前时钟下的 datetime"""
+    if timestamp is None:
+        return None
+    return datetime.now() - timedelta(seconds=time.monotonic() - timestamp)
+
+
 class ErrorHandler:
     """错误处理器类"""
     
     def __init__(self):
         """初始化错误处理器"""
         self.error_stats: Dict[str, Dict[str, Any]] = {}
-        self.last_error_time: Optional[datetime] = None
+        self.last_error_time: Optional[float] = None  # time.monotonic() 时间戳
         self.error_threshold = 10  # 错误阈值
-        self.error_window = timedelta(minutes=5)  # 错误窗口时间
+        self.error_window = 300.0  # 错误窗口时间（秒）
+        self._recent_errors: Deque[float] = deque()  # 窗口内错误的单调时钟时间戳
     
     def handle_error(self, error: Exception, context: str = "", 
                     user_id: Optional[int] = None, 
@@ -38,7 +112,7 @@ class ErrorHandler:
         Returns:
             True表示错误已处理，False表示达到错误阈值
         """
-        error_type = type(error).__name__
+        error_type, log_level, error_kind = _classify_error(type(error))
         error_msg = str(error)
         
         # 记录错误统计
@@ -50,22 +124,22 @@ class ErrorHandler:
             return False
         
         # 记录错误日志
-        self._log_error(error, context, user_id)
+        self._log_error(error_type, log_level, error_msg, context, user_id)
         
         # 根据错误类型采取不同处理策略
-        return self._apply_error_strategy(error, should_retry)
+        return self._apply_error_strategy(error_kind, error_msg, should_retry)
     
     def _record_error_stat(self, error_type: str, context: str, user_id: Optional[int]) -> None:
         """记录错误统计"""
-        now = datetime.now()
+        now = time.monotonic()
         
         if error_type not in self.error_stats:
             self.error_stats[error_type] = {
                 'count': 0,
                 'first_occurrence': now,
                 'last_occurrence': now,
-                'contexts': set(),
-                'user_ids': set()
+                'contexts': BoundedSet(_MAX_ERROR_CONTEXTS),
+                'user_ids': BoundedSet(_MAX_ERROR_USER_IDS)
             }
         
         stat = self.error_stats[error_type]
@@ -77,26 +151,21 @@ class ErrorHandler:
             stat['user_ids'].add(user_id)
         
         self.last_error_time = now
+        self._recent_errors.append(now)
     
     def _check_error_threshold(self) -> bool:
         """检查错误阈值"""
-        if not self.last_error_time:
-            return False
-        
-        # 检查最近错误频率
-        recent_errors = 0
-        cutoff_time = datetime.now() - self.error_window
+        # 滑动窗口：丢弃窗口外的时间戳，剩余数量即窗口内的错误数
+        recent_errors = self._recent_errors
+        cutoff = time.monotonic() - self.error_window
+        while recent_errors and recent_errors[0] < cutoff:
+            recent_errors.popleft()
         
-        for stat in self.error_stats.values():
-            if stat['last_occurrence'] > cutoff_time:
-                recent_errors += stat['count']
-        
-        return recent_errors >= self.error_threshold
+        return len(recent_errors) >= self.error_threshold
     
-    def _log_error(self, error: Exception, context: str, user_id: Optional[int]) -> None:
+    def _log_error(self, error_type: str, log_level: int, error_msg: str,
+                   context: str, user_id: Optional[int]) -> None:
         """记录错误日志"""
-        error_type = type(error).__name__
-        
         # 构建日志消息
         log_parts = [f"错误类型: {error_type}"]
         
@@ -106,36 +175,31 @@ class ErrorHandler:
         if user_id:
             log_parts.append(f"用户ID: {user_id}")
         
-        log_parts.append(f"错误信息: {str(error)}")
+        log_parts.append(f"错误信息: {error_msg}")
         
-        # 根据错误类型选择日志级别
-        if isinstance(error, (ConnectionError, TimeoutError)):
-            logger.warning(" | ".join(log_parts))
-        elif isinstance(error, (ValueError, TypeError)):
-            logger.error(" | ".join(log_parts))
-        else:
-            logger.error(" | ".join(log_parts))
+        # 日志级别由错误类型决定：网络/超时错误为WARNING，其余为ERROR
+        logger.log(log_level, " | ".join(log_parts))
             
-        # 在调试模式下记录完整堆栈跟踪
-        if settings.DEBUG:
-            logger.debug("完整堆栈跟踪:\n%s", traceback.format_exc())
+        # 在调试模式下记录完整堆栈跟踪，由日志框架延迟格式化
+        if settings.DEBUG and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("完整堆栈跟踪:", exc_info=True)
     
-    def _apply_error_strategy(self, error: Exception, should_retry: bool) -> bool:
+    def _apply_error_strategy(self, error_kind: str, error_msg: str, should_retry: bool) -> bool:
         """应用错误处理策略"""
-        error_type = type(error)
-        
         # 网络相关错误 - 建议重试
-        if error_type in [ConnectionError, TimeoutError, asyncio.TimeoutError]:
+        if error_kind == _KIND_NETWORK:
             logger.warning("网络错误，建议检查网络连接")
             return should_retry
         
+        lowered_msg = error_msg.lower()
+        
         # 认证相关错误 - 需要用户干预
-        elif error_type in [PermissionError, ValueError] and "auth" in str(error).lower():
+        if error_kind == _KIND_AUTH and "auth" in lowered_msg:
             logger.error("认证错误，需要检查配置")
             return False
         
         # 配置相关错误 - 需要修复配置
-        elif "config" in str(error).lower() or "setting" in str(error).lower():
+        elif "config" in lowered_msg or "setting" in lowered_msg:
             logger.error("配置错误，需要修复配置文件")
             return False
         
@@ -152,31 +216,61 @@ class ErrorHandler:
         """
         total_errors = sum(stat['count'] for stat in self.error_stats.values())
         
+        # 内部使用单调时钟，对外展示时转换为 datetime
+        error_details = {
+            error_type: {
+                **stat,
+                'first_occurrence': _monotonic_to_datetime(stat['first_occurrence']),
+                'last_occurrence': _monotonic_to_datetime(stat['last_occurrence']),
+            }
+            for error_type, stat in self.error_stats.items()
+        }
+        
         return {
             'total_errors': total_errors,
             'error_types': len(self.error_stats),
-            'error_details': self.error_stats,
-            'last_error_time': self.last_error_time,
+            'error_details': error_details,
+            'last_error_time': _monotonic_to_datetime(self.last_error_time),
             'error_threshold': self.error_threshold,
-            'error_window_minutes': self.error_window.total_seconds() / 60
+            'error_window_minutes': self.error_window / 60
         }
     
     def reset_statistics(self) -> None:
         """重置错误统计"""
         self.error_stats.clear()
         self.last_error_time = None
+        self._recent_errors.clear()
+
+
+def _in_running_loop() -> bool:
+    """检查当前线程是否有正在运行的事件循环"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _jittered(delay: float) -> float:
+    """为退避延迟加入随机抖动，取值范围 [0.5·delay, delay]，避免大量客户端同步重试"""
+    return delay * (0.5 + random.random() * 0.5)
 
 
 def retry_on_error(max_retries: int = 3, delay: float = 1.0, 
                   backoff_factor: float = 2.0,
-                  exceptions: tuple = (Exception,)):
+                  exceptions: tuple = (Exception,),
+                  max_delay: Optional[float] = None):
     """错误重试装饰器
     
+    协程函数使用 asyncio.sleep 等待重试；普通函数使用 time.sleep，
+    若在运行中的事件循环线程内调用会阻塞整个循环，此时会记录警告。
+    
     Args:
         max_retries: 最大重试次数
         delay: 初始延迟时间（秒）
         backoff_factor: 退避因子
         exceptions: 需要重试的异常类型
+        max_delay: 单次退避延迟上限（秒），None表示不限制
         
     Returns:
         装饰器函数
@@ -198,11 +292,14 @@ def retry_on_error(max_retries: int = 3, delay: float = 1.0,
                             logger.error("达到最大重试次数 (%d)，放弃重试", max_retries)
                             raise
                         
-                        logger.warning("操作失败，%d秒后重试 (尝试 %d/%d)", 
-                                     current_delay, attempt + 1, max_retries)
+                        wait = _jittered(current_delay)
+                        logger.warning("操作失败，%.1f秒后重试 (尝试 %d/%d)", 
+                                     wait, attempt + 1, max_retries)
                         
-                        await asyncio.sleep(current_delay)
+                        await asyncio.sleep(wait)
                         current_delay *= backoff_factor
+                        if max_delay is not None:
+                            current_delay = min(current_delay, max_delay)
                 
                 raise last_exception
             
@@ -216,7 +313,12 @@ def retry_on_error(max_retries: int = 3, delay: float = 1.0,
                 
                 for attempt in range(max_retries + 1):
                     try:
-                        return func(*args, **kwargs)
+                        result = func(*args, **kwargs)
+                        if asyncio.iscoroutine(result):
+                            # 返回协程的普通函数只会在被 await 时失败，同步重试无法覆盖
+                            logger.warning("%s 返回了协程，同步重试不会生效，请将其声明为 async 函数",
+                                           getattr(func, '__qualname__', func))
+                        return result
                     except exceptions as e:
                         last_exception = e
                         
@@ -224,12 +326,17 @@ def retry_on_error(max_retries: int = 3, delay: float = 1.0,
                             logger.error("达到最大重试次数 (%d)，放弃重试", max_retries)
                             raise
                         
-                        logger.warning("操作失败，%d秒后重试 (尝试 %d/%d)", 
-                                     current_delay, attempt + 1, max_retries)
+                        wait = _jittered(current_delay)
+                        logger.warning("操作失败，%.1f秒后重试 (尝试 %d/%d)", 
+                                     wait, attempt + 1, max_retries)
                         
-                        import time
-                        time.sleep(current_delay)
+                        if _in_running_loop():
+                            logger.warning("同步重试在运行中的事件循环内阻塞等待 %.1f 秒，请改用异步函数",
+                                           wait)
+                        time.sleep(wait)
                         current_delay *= backoff_factor
+                        if max_delay is not None:
+                            current_delay = min(current_delay, max_delay)
                 
                 raise last_exception
             
@@ -279,8 +386,19 @@ def safe_execute(default_return: Any = None,
     return decorator
 
 
+# 断路器状态
+_CB_CLOSED = 0
+_CB_OPEN = 1
+_CB_HALF_OPEN = 2
+_CB_STATE_NAMES = ("closed", "open", "half-open")
+
+
 class CircuitBreaker:
-    """断路器模式实现"""
+    """断路器模式实现
+    
+    状态以整数表示，closed 状态下的检查无需加锁；
+    状态转换在锁内完成，保证多线程下计数与状态一致。
+    """
     
     def __init__(self, failure_threshold: int = 5, 
                  recovery_timeout: int = 60):
@@ -293,8 +411,14 @@ class CircuitBreaker:
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.failure_count = 0
-        self.last_failure_time = None
-        self.state = "closed"  # closed, open, half-open
+        self.last_failure_time: Optional[float] = None  # time.monotonic() 时间戳
+        self._state = _CB_CLOSED
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """当前状态名称：closed, open, half-open"""
+        return _CB_STATE_NAMES[self._state]
     
     def can_execute(self) -> bool:
         """检查是否允许执行
@@ -302,34 +426,45 @@ class CircuitBreaker:
         Returns:
             True表示允许执行，False表示断路器打开
         """
-        if self.state == "closed":
+        if self._state == _CB_CLOSED:
             return True
         
-        elif self.state == "open":
-            # 检查是否超过恢复时间
-            if (self.last_failure_time and 
-                (datetime.now() - self.last_failure_time).total_seconds() > self.recovery_timeout):
-                self.state = "half-open"
-                return True
-            return False
-        
-        else:  # half-open
+        with self._lock:
+            if self._state == _CB_OPEN:
+                # 检查是否超过恢复时间
+                if (self.last_failure_time is not None and 
+                    time.monotonic() - self.last_failure_time > self.recovery_timeout):
+                    self._state = _CB_HALF_OPEN
+                    return True
+                return False
+            
+            # closed 或 half-open
             return True
     
     def record_success(self) -> None:
         """记录成功执行"""
-        if self.state == "half-open":
-            self.state = "closed"
-            self.failure_count = 0
-            self.last_failure_time = None
+        if self._state == _CB_CLOSED:
+            return
+        
+        with self._lock:
+            if self._state == _CB_HALF_OPEN:
+                self._state = _CB_CLOSED
+                self.failure_count = 0
+                self.last_failure_time = None
     
     def record_failure(self) -> None:
         """记录失败执行"""
-        self.failure_count += 1
-        self.last_failure_time = datetime.now()
+        with self._lock:
+            self.failure_count += 1
+            self.last_failure_time = time.monotonic()
+            
+            if self.failure_count >= self.failure_threshold:
+                opened = self._state != _CB_OPEN
+                self._state = _CB_OPEN
+            else:
+                opened = False
         
-        if self.failure_count >= self.failure_threshold:
-            self.state = "open"
+        if opened:
             logger.warning("断路器打开，服务暂时不可用")
     
     def get_state(self) -> str:
@@ -3,14 +3,84 @@
 提供文件缓存功能，减少重复的文件操作，提升性能。
 """
 import os
+import errno
 import time
+import heapq
 import hashlib
+import shutil
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, NamedTuple, Set, Tuple, Union
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # 非 POSIX 平台
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+# Linux FICLONE ioctl：_IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+# FICLONE 返回这些错误时表示文件系统（组合）不支持 reflink，如 ext4、overlayfs 或跨设备
+_FICLONE_UNSUPPORTED_ERRNOS = frozenset(
+    getattr(errno, name) for name in ("EOPNOTSUPP", "ENOTSUP", "EXDEV", "ENOTTY", "EINVAL", "ENOSYS")
+    if hasattr(errno, name)
+)
+# 已确认不支持 reflink 的 (源设备, 目标设备)，之后直接复制
+_ficlone_unsupported: Set[Tuple[int, int]] = set()
+
+# 缓存文件扩展名
+_CACHE_SUFFIX = ".cache"
+# 旧版本使用的索引文件，缓存状态现由缓存目录扫描重建
+_LEGACY_INDEX_FILES = ("index.txt", "index.bin")
+
+
+class _CacheEntry(NamedTuple):
+    """缓存条目"""
+    timestamp: float
+    size: int
+
+
+def _move_or_copy(src: str, dst: Path, move: bool) -> None:
+    """以尽量少的数据拷贝将文件放入缓存
+    
+    移动时优先在同一文件系统内重命名（不拷贝数据）；复制时不使用硬链接，
+    避免缓存文件与源文件共享 inode 而随源文件的修改一起改变。
+    复制依次尝试 reflink 写时复制克隆（Btrfs/XFS 等），
+    最后回退到 shutil.copyfile（内部使用 copy_file_range/sendfile）。
+    """
+    if move:
+        try:
+            os.replace(src, dst)
+            return
+        except OSError:
+            pass
+    
+    try:
+        dst.unlink()
+    except FileNotFoundError:
+        pass
+    
+    copied = False
+    if fcntl is not None:
+        devices = (os.stat(src).st_dev, os.stat(dst.parent).st_dev)
+        if devices not in _ficlone_unsupported:
+            try:
+                with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                    fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                copied = True
+            except OSError as e:
+                if e.errno in _FICLONE_UNSUPPORTED_ERRNOS:
+                    # 记住不支持的设备组合，后续复制不再尝试 ioctl
+                    _ficlone_unsupported.add(devices)
+    
+    if not copied:
+        shutil.copyfile(src, dst)
+    
+    if move:
+        os.unlink(src)
+
 
 class FileCache:
     """文件缓存管理器"""
@@ -26,49 +96,51 @@ class FileCache:
         self.cache_dir = Path(cache_dir)
         self.max_size = max_size
         self.ttl = ttl
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._cache: Dict[str, _CacheEntry] = {}
         
         # 确保缓存目录存在
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
-        # 加载现有缓存索引
-        self._load_cache_index()
+        # 移除旧版本遗留的索引文件
+        for name in _LEGACY_INDEX_FILES:
+            try:
+                (self.cache_dir / name).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"移除旧缓存索引文件失败 {name}: {e}")
+        
+        # 从缓存目录重建缓存状态
+        self._scan_cache_dir()
     
-    def _get_cache_key(self, content: str) -> str:
+    def _get_cache_key(self, content: Union[str, bytes]) -> str:
         """生成缓存键
         
+        使用16字节摘要的 blake2b，比 MD5 更快。
+        
         Args:
-            content: 内容字符串
+            content: 内容字符串或字节串
             
         Returns:
             str: 缓存键
         """
-        return hashlib.md5(content.encode()).hexdigest()
-    
-    def _load_cache_index(self):
-        """加载缓存索引"""
-        try:
-            index_file = self.cache_dir / "index.txt"
-            if index_file.exists():
-                with open(index_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        key, timestamp, size = line.strip().split('|')
-                        self._cache[key] = {
-                            'timestamp': float(timestamp),
-                            'size': int(size)
-                        }
-        except Exception as e:
-            logger.warning(f"加载缓存索引失败: {e}")
+        if isinstance(content, str):
+            content = content.encode()
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
     
-    def _save_cache_index(self):
-        """保存缓存索引"""
+    def _scan_cache_dir(self):
+        """扫描缓存目录重建缓存状态
+        
+        缓存文件的 mtime 即写入缓存的时间，st_size 即文件大小，无需单独的索引文件；
+        运行期间的访问时间只记录在内存中。
+        """
         try:
-            index_file = self.cache_dir / "index.txt"
-            with open(index_file, 'w', encoding='utf-8') as f:
-                for key, info in self._cache.items():
-                    f.write(f"{key}|{info['timestamp']}|{info['size']}\n")
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.endswith(_CACHE_SUFFIX) and entry.is_file():
+                        st = entry.stat()
+                        self._cache[name[:-len(_CACHE_SUFFIX)]] = _CacheEntry(st.st_mtime, st.st_size)
         except Exception as e:
-            logger.warning(f"保存缓存索引失败: {e}")
+            logger.warning(f"扫描缓存目录失败: {e}")
     
     def _clean_expired_cache(self):
         """清理过期缓存"""
@@ -76,7 +148,7 @@ class FileCache:
         expired_keys = []
         
         for key, info in self._cache.items():
-            if current_time - info['timestamp'] > self.ttl:
+            if current_time - info.timestamp > self.ttl:
                 expired_keys.append(key)
         
         for key in expired_keys:
@@ -84,12 +156,11 @@ class FileCache:
             del self._cache[key]
         
         # 如果缓存仍然过大，清理最旧的缓存
-        if len(self._cache) > self.max_size:
-            sorted_keys = sorted(self._cache.keys(), 
-                               key=lambda k: self._cache[k]['timestamp'])
-            keys_to_remove = sorted_keys[:len(self._cache) - self.max_size]
+        excess = len(self._cache) - self.max_size
+        if excess > 0:
+            oldest = heapq.nsmallest(excess, self._cache.items(), key=lambda item: item[1].timestamp)
             
-            for key in keys_to_remove:
+            for key, _ in oldest:
                 self._remove_cache_file(key)
                 del self._cache[key]
     
@@ -100,9 +171,7 @@ class FileCache:
             key: 缓存键
         """
         try:
-            cache_file = self.cache_dir / f"{key}.cache"
-            if cache_file.exists():
-                cache_file.unlink()
+            (self.cache_dir / f"{key}{_CACHE_SUFFIX}").unlink(missing_ok=True)
         except Exception as e:
             logger.warning(f"移除缓存文件失败 {key}: {e}")
     
@@ -117,32 +186,34 @@ class FileCache:
         """
         key = self._get_cache_key(content)
         
-        if key not in self._cache:
+        info = self._cache.get(key)
+        if info is None:
             return None
         
         # 检查缓存是否过期
-        if time.time() - self._cache[key]['timestamp'] > self.ttl:
+        now = time.time()
+        if now - info.timestamp > self.ttl:
             self._remove_cache_file(key)
-            del self._cache[key]
+            self._cache.pop(key, None)
             return None
         
-        cache_file = self.cache_dir / f"{key}.cache"
+        cache_file = self.cache_dir / f"{key}{_CACHE_SUFFIX}"
         if not cache_file.exists():
             del self._cache[key]
             return None
         
-        # 更新访问时间
-        self._cache[key]['timestamp'] = time.time()
-        self._save_cache_index()
+        # 更新访问时间（仅内存）
+        self._cache[key] = _CacheEntry(now, info.size)
         
         return str(cache_file)
     
-    def put(self, content: str, file_path: str) -> str:
+    def put(self, content: str, file_path: str, move: bool = False) -> str:
         """添加缓存
         
         Args:
             content: 内容字符串
             file_path: 文件路径
+            move: 是否将源文件移入缓存（源文件随后不再可用），否则复制
             
         Returns:
             str: 缓存文件路径
@@ -151,20 +222,18 @@ class FileCache:
         self._clean_expired_cache()
         
         key = self._get_cache_key(content)
-        cache_file = self.cache_dir / f"{key}.cache"
+        cache_file = self.cache_dir / f"{key}{_CACHE_SUFFIX}"
         
         try:
-            # 复制文件到缓存目录
-            import shutil
-            shutil.copy2(file_path, cache_file)
-            
-            # 更新缓存索引
-            self._cache[key] = {
-                'timestamp': time.time(),
-                'size': os.path.getsize(cache_file)
-            }
+            # 将文件放入缓存目录
+            _move_or_copy(file_path, cache_file, move)
             
-            self._save_cache_index()
+            now = time.time()
+            if move:
+                # 重命名会保留源文件的 mtime，刷新为写入时间供重启后扫描使用；
+                # 源路径已不存在，不会影响其他文件
+                os.utime(cache_file, (now, now))
+            self._cache[key] = _CacheEntry(now, os.stat(cache_file).st_size)
             
             return str(cache_file)
             
@@ -176,13 +245,8 @@ class FileCache:
         """清空缓存"""
         try:
             # 删除所有缓存文件
-            for cache_file in self.cache_dir.glob("*.cache"):
-                cache_file.unlink()
-            
-            # 删除索引文件
-            index_file = self.cache_dir / "index.txt"
-            if index_file.exists():
-                index_file.unlink()
+            for cache_file in self.cache_dir.glob(f"*{_CACHE_SUFFIX}"):
+                cache_file.unlink(missing_ok=True)
             
             self._cache.clear()
             logger.info("缓存已清空")
@@ -1,14 +1,71 @@
 """文件管理器模块"""
+import asyncio
 import os
+import stat
 import tempfile
 import logging
 import shutil
 from typing import Optional, Union
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# 分割文件时单次读写的块大小
+_SPLIT_IO_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def _stat(path: str) -> Optional[os.stat_result]:
+    """获取文件状态，文件不存在或无法访问时返回 None"""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _copy_range_kernel(src, dst, offset: int, length: int) -> int:
+    """在内核态将 src 从 offset 起的 length 字节追加到 dst
+    
+    使用 os.copy_file_range，数据不经过用户态缓冲区。
+    
+    Returns:
+        实际复制的字节数，平台或文件系统不支持时可能小于 length
+    """
+    if not hasattr(os, 'copy_file_range'):
+        return 0
+    
+    copied = 0
+    try:
+        while copied < length:
+            n = os.copy_file_range(src.fileno(), dst.fileno(), length - copied, offset + copied)
+            if n == 0:
+                break
+            copied += n
+    except OSError:
+        pass
+    return copied
+
+
+def _copy_range_buffered(src, dst, length: int, writer: ThreadPoolExecutor) -> None:
+    """从 src 当前位置读取 length 字节写入 dst
+    
+    读写重叠：后台线程写入当前块的同时读取下一块，
+    同一时刻最多只有一个写入在进行，内存占用不超过两个IO块。
+    """
+    pending = None
+    remaining = length
+    while remaining > 0:
+        block = src.read(min(_SPLIT_IO_BLOCK_SIZE, remaining))
+        if not block:
+            break
+        remaining -= len(block)
+        if pending is not None:
+            pending.result()
+        pending = writer.submit(dst.write, block)
+    if pending is not None:
+        pending.result()
+
 
 class FileManager:
     """文件管理器"""
@@ -44,10 +101,12 @@ class FileManager:
             raise
         finally:
             # 清理临时文件
-            if temp_file and os.path.exists(temp_file.name):
+            if temp_file:
                 try:
                     os.remove(temp_file.name)
                     logger.debug(f"清理临时文件: {temp_file.name}")
+                except FileNotFoundError:
+                    pass
                 except Exception as e:
                     logger.warning(f"清理临时文件失败 {temp_file.name}: {e}")
     
@@ -96,7 +155,8 @@ class FileManager:
     
     def file_exists(self, file_path: str) -> bool:
         """检查文件是否存在"""
-        return os.path.exists(file_path) and os.path.isfile(file_path)
+        st = _stat(file_path)
+        return st is not None and stat.S_ISREG(st.st_mode)
     
     def move_file(self, src: str, dst: str) -> bool:
         """移动文件"""
@@ -118,13 +178,21 @@ class FileManager:
             logger.error(f"复制文件失败 {src} -> {dst}: {e}")
             return False
     
+    async def move_file_async(self, src: str, dst: str) -> bool:
+        """在线程池中移动文件，避免跨文件系统复制时阻塞事件循环"""
+        return await asyncio.to_thread(self.move_file, src, dst)
+    
+    async def copy_file_async(self, src: str, dst: str) -> bool:
+        """在线程池中复制文件，避免大文件复制阻塞事件循环"""
+        return await asyncio.to_thread(self.copy_file, src, dst)
+    
     def safe_remove(self, file_path: str) -> bool:
         """安全删除文件"""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.debug(f"删除文件: {file_path}")
-                return True
+            os.remove(file_path)
+            logger.debug(f"删除文件: {file_path}")
+            return True
+        except FileNotFoundError:
             return False
         except Exception as e:
             logger.error(f"删除文件失败 {file_path}: {e}")
@@ -141,13 +209,12 @@ class FileManager:
             操作成功返回 True，失败返回 False
         """
         try:
-            if not os.path.exists(src):
-                logger.error(f"源文件不存在: {src}")
-                return False
-            
             os.rename(src, dst)
             logger.debug(f"重命名文件: {src} -> {dst}")
             return True
+        except FileNotFoundError:
+            logger.error(f"源文件或目标目录不存在: {src} -> {dst}")
+            return False
         except Exception as e:
             logger.error(f"重命名文件失败 {src} -> {dst}: {e}")
             return False
@@ -212,16 +279,25 @@ class FileManager:
             目录大小（字节）
         """
         total_size = 0
-        try:
-            for dirpath, dirnames, filenames in os.walk(dir_path):
-                for filename in filenames:
-                    file_path = os.path.join(dirpath, filename)
-                    if os.path.isfile(file_path):
-                        total_size += os.path.getsize(file_path)
-            return total_size
-        except Exception as e:
-            logger.error(f"获取目录大小失败 {dir_path}: {e}")
-            return 0
+        # DirEntry 的类型信息来自 readdir，每个文件只需一次 stat
+        pending = [dir_path]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_file(follow_symlinks=False):
+                                total_size += entry.stat(follow_symlinks=False).st_size
+                            elif entry.is_dir(follow_symlinks=False):
+                                pending.append(entry.path)
+                        except OSError:
+                            # 条目在遍历期间被删除或无法访问，跳过并继续累加
+                            continue
+            except OSError as e:
+                # 与 os.walk 一致，跳过无法读取的目录而不中断整个遍历
+                logger.debug(f"跳过无法读取的目录 {current}: {e}")
+        return total_size
     
     def split_file(self, file_path: str, chunk_size: int = 1900 * 1024 * 1024) -> list:
         """将大文件分割成多个小块
@@ -247,12 +323,19 @@ class FileManager:
             # 创建临时目录存放分片
             temp_dir = tempfile.mkdtemp(prefix="split_", dir=self.base_temp_dir)
             
-            with open(file_path, 'rb') as f:
+            with open(file_path, 'rb') as f, ThreadPoolExecutor(max_workers=1) as writer:
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                
                 for i in range(chunk_count):
                     chunk_file = os.path.join(temp_dir, f"{base_name}.part{i+1:03d}{ext}")
+                    offset = i * chunk_size
+                    length = min(chunk_size, file_size - offset)
                     with open(chunk_file, 'wb') as chunk_f:
-                        chunk = f.read(chunk_size)
-                        chunk_f.write(chunk)
+                        copied = _copy_range_kernel(f, chunk_f, offset, length)
+                        if copied < length:
+                            f.seek(offset + copied)
+                            _copy_range_buffered(f, chunk_f, length - copied, writer)
                     chunks.append(chunk_file)
                     logger.debug(f"已创建分片: {chunk_file}")
             
@@ -2,24 +2,94 @@
 
 提供高级日志配置功能，包括日志轮转、结构化日志和性能优化。
 """
+import atexit
 import logging
 import os
 import glob
 import sys
 import json
+import queue
+import threading
+import time
 from datetime import datetime, timedelta
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from logging.handlers import (
+    MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+)
+from typing import Dict, Any, List, Optional, Tuple
 
 from ..config import settings
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库 json
+    orjson = None
 
-class StructuredFormatter(logging.Formatter):
-    """结构化日志格式化器"""
+
+def _json_dumps(data: Any) -> str:
+    """序列化为JSON字符串（保留非ASCII字符），优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(data).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False)
+
+
+# 可选的上下文字段，由 extra 参数附加到日志记录上
+_CONTEXT_KEYS = ('user_id', 'chat_id', 'message_id')
+
+
+class _ContextLogRecord(logging.LogRecord):
+    """带上下文字段默认值的日志记录
+    
+    默认值定义为类属性而非实例属性：实例 __dict__ 中若已有同名键，
+    makeRecord 会拒绝通过 extra 传入这些字段。
+    """
+    user_id = None
+    chat_id = None
+    message_id = None
+
+
+# 仅在未被其他代码替换时安装，避免覆盖自定义的记录工厂
+if logging.getLogRecordFactory() is logging.LogRecord:
+    logging.setLogRecordFactory(_ContextLogRecord)
+
+
+# 所有格式化器共享的时间字符串缓存：(秒, datefmt, converter) -> 格式化结果
+_TIME_CACHE: Dict[Tuple[int, str, Any], str] = {}
+_TIME_CACHE_SIZE = 8
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """缓存时间格式化结果的格式化器
+    
+    指定了秒级 datefmt 时，同一秒内的记录（跨处理器）复用同一个时间字符串，
+    跳过重复的 localtime + strftime。
+    """
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if datefmt is None:
+            return super().formatTime(record, datefmt)
+        
+        seconds = int(record.created)
+        key = (seconds, datefmt, self.converter)
+        formatted = _TIME_CACHE.get(key)
+        if formatted is None:
+            formatted = time.strftime(datefmt, self.converter(seconds))
+            if len(_TIME_CACHE) >= _TIME_CACHE_SIZE:
+                _TIME_CACHE.clear()
+            _TIME_CACHE[key] = formatted
+        return formatted
+
+
+class TextFormatter(CachedTimeFormatter):
+    """易读文本格式化器（开发环境）"""
+
+
+class JSONFormatter(CachedTimeFormatter):
+    """结构化JSON日志格式化器（生产环境）"""
     
     def __init__(self, fmt: Optional[str] = None, datefmt: Optional[str] = None):
         super().__init__(fmt, datefmt)
-        self.enable_json = settings.ENVIRONMENT == "production"
+        self._dumps = _json_dumps
     
     def format(self, record: logging.LogRecord) -> str:
         """格式化日志记录
@@ -30,35 +100,163 @@ class StructuredFormatter(logging.Formatter):
         Returns:
             格式化后的日志字符串
         """
-        if self.enable_json:
-            # 生产环境使用JSON格式
-            log_data = {
-                "timestamp": self.formatTime(record, self.datefmt),
-                "level": record.levelname,
-                "logger": record.name,
-                "message": record.getMessage(),
-                "module": record.module,
-                "function": record.funcName,
-                "line": record.lineno
-            }
-            
-            # 添加额外字段
-            if hasattr(record, 'user_id') and record.user_id:
-                log_data["user_id"] = record.user_id
-            
-            if hasattr(record, 'chat_id') and record.chat_id:
-                log_data["chat_id"] = record.chat_id
-            
-            if hasattr(record, 'message_id') and record.message_id:
-                log_data["message_id"] = record.message_id
-            
-            if record.exc_info:
-                log_data["exception"] = self.formatException(record.exc_info)
-            
-            return json.dumps(log_data, ensure_ascii=False)
-        else:
-            # 开发环境使用易读格式
-            return super().format(record)
+        log_data = {
+            "timestamp": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno
+        }
+        
+        # 添加额外字段
+        d = record.__dict__
+        log_data.update({key: d[key] for key in _CONTEXT_KEYS if d.get(key)})
+        
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+            log_data["exception"] = record.exc_text
+        
+        return self._dumps(log_data)
+
+
+# 日志文件写缓冲区大小
+_FILE_BUFFER_SIZE = 64 * 1024
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """带写缓冲的轮转文件处理器
+    
+    文件以64KB缓冲打开；批量写入期间跳过逐条 flush，
+    由 TimedMemoryHandler 在整批记录写完后统一 flush 一次。
+    
+    标准库的 shouldRollover 每条记录都会 seek/tell 文件流，这会把缓冲区刷到磁盘，
+    因此这里改为在内存中累计已写入的字节数，只在需要轮转时才操作文件。
+    """
+    
+    def __init__(self, *args, **kwargs):
+        self._defer_flush = False
+        self._bytes_written = 0
+        super().__init__(*args, **kwargs)
+    
+    def _open(self):
+        stream = open(self.baseFilename, self.mode, buffering=_FILE_BUFFER_SIZE,
+                      encoding=self.encoding, errors=self.errors)
+        # 追加模式下从已有文件大小开始计数，轮转后的新文件为0
+        self._bytes_written = os.fstat(stream.fileno()).st_size
+        return stream
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        """写入一条记录，按内存中的字节计数判断是否轮转
+        
+        Args:
+            record: 日志记录
+        """
+        try:
+            msg = self.format(record) + self.terminator
+            size = len(msg.encode(self.encoding or 'utf-8', self.errors or 'strict'))
+            if self.stream is None:
+                self.stream = self._open()
+            if 0 < self.maxBytes <= self._bytes_written + size and self._bytes_written:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self._bytes_written += size
+            self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def flush(self) -> None:
+        if not self._defer_flush:
+            super().flush()
+
+
+class TimedMemoryHandler(MemoryHandler):
+    """带时间上限的缓冲处理器
+    
+    批量写入目标处理器，缓冲区满或出现 flushLevel 及以上级别的记录时刷新，
+    并由后台线程每 flush_interval 秒刷新一次以限制日志延迟。
+    """
+    
+    def __init__(self, capacity: int, target: logging.Handler,
+                 flushLevel: int = logging.ERROR, flush_interval: float = 1.0):
+        super().__init__(capacity, flushLevel=flushLevel, target=target, flushOnClose=True)
+        self.flush_interval = flush_interval
+        self._closed_event = threading.Event()
+        self._flusher = threading.Thread(target=self._periodic_flush, name="log-flusher", daemon=True)
+        self._flusher.start()
+    
+    def _periodic_flush(self) -> None:
+        """定时刷新缓冲区"""
+        while not self._closed_event.wait(self.flush_interval):
+            self.flush()
+    
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if not self.buffer:
+                return
+            target = self.target
+            if isinstance(target, BufferedRotatingFileHandler):
+                # 整批记录写入文件缓冲区后只 flush 一次
+                target._defer_flush = True
+                try:
+                    super().flush()
+                finally:
+                    target._defer_flush = False
+                    target.flush()
+            else:
+                super().flush()
+        finally:
+            self.release()
+    
+    def close(self) -> None:
+        """停止刷新线程，写出剩余记录后关闭"""
+        self._closed_event.set()
+        if self._flusher.is_alive() and self._flusher is not threading.current_thread():
+            self._flusher.join()
+        super().close()
+
+
+class _LocalQueueHandler(QueueHandler):
+    """进程内日志队列处理器
+    
+    记录只在同一进程的线程间传递，无需像默认实现那样预先格式化并清除异常信息，
+    仅合并消息参数，其余格式化工作留给后台监听线程中的处理器。
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+# 后台日志监听线程，负责实际的控制台和文件写入
+_queue_listener: Optional[QueueListener] = None
+
+
+def _stop_queue_listener() -> None:
+    """停止后台日志监听线程，写出队列中剩余的记录并关闭其处理器
+    
+    重复调用 setup_logging 时旧的缓冲处理器及其刷新线程、文件句柄都会被释放。
+    """
+    global _queue_listener
+    if _queue_listener is None:
+        return
+    
+    listener, _queue_listener = _queue_listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        # MemoryHandler.close 会清空 target，需先取出以便随后关闭文件处理器
+        target = getattr(handler, 'target', None)
+        handler.close()
+        if target is not None:
+            target.close()
 
 
 def setup_logging():
@@ -75,7 +273,16 @@ def setup_logging():
         log_level_name = settings.LOG_LEVEL.upper()
         log_level = getattr(logging, log_level_name, logging.INFO)
     
-    # 清除现有的处理器
+    # 日志格式中不使用线程/进程/asyncio 任务信息，跳过每条记录对它们的采集
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    logging.logAsyncioTasks = False
+    
+    # 停止上一次配置的监听线程并清除现有的处理器
+    global _queue_listener
+    _stop_queue_listener()
+    
     root_logger = logging.getLogger()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
@@ -85,7 +292,7 @@ def setup_logging():
     os.makedirs(log_dir, exist_ok=True)
     
     # 清理旧的日志文件，只保留最新的10个
-    _cleanup_old_logs(log_dir)
+    log_files = _cleanup_old_logs(log_dir)
     
     # 定义日志格式
     log_formats = {
@@ -95,29 +302,45 @@ def setup_logging():
     }
     
     # 创建格式化器
-    console_formatter = logging.Formatter(log_formats['console'], log_formats['datefmt'])
-    file_formatter = StructuredFormatter(log_formats['file'], log_formats['datefmt'])
+    # 文件格式在启动时按环境确定：生产环境使用JSON，开发环境使用易读格式
+    console_formatter = TextFormatter(log_formats['console'], log_formats['datefmt'])
+    file_formatter_class = JSONFormatter if settings.ENVIRONMENT == "production" else TextFormatter
+    file_formatter = file_formatter_class(log_formats['file'], log_formats['datefmt'])
     
     # 添加控制台处理器
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
     console_handler.setFormatter(console_formatter)
-    root_logger.addHandler(console_handler)
     
     # 添加文件处理器（带重启序号的日志文件）
-    log_file = _get_next_log_file(log_dir)
+    log_file = _get_next_log_file(log_dir, log_files)
     
     # 使用RotatingFileHandler实现按重启次数轮转
     # 保留最近10个日志文件
-    file_handler = RotatingFileHandler(
+    file_handler = BufferedRotatingFileHandler(
         filename=log_file,
         maxBytes=50 * 1024 * 1024,  # 50MB
         backupCount=9,              # 保留最近10个日志文件（包括当前文件）
-        encoding='utf-8'
+        encoding='utf-8',
+        delay=True                  # 首次写入时才打开文件
     )
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(file_formatter)
-    root_logger.addHandler(file_handler)
+    
+    # 缓冲文件写入，INFO/DEBUG 记录合并为少量 write 调用，ERROR 及以上立即写出
+    buffered_file_handler = TimedMemoryHandler(capacity=512, target=file_handler)
+    buffered_file_handler.setLevel(logging.INFO)
+    
+    # 调用方只需将记录放入队列，格式化和磁盘写入由后台线程完成，避免阻塞事件循环
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(_LocalQueueHandler(log_queue))
+    _queue_listener = QueueListener(
+        log_queue, console_handler, buffered_file_handler, respect_handler_level=True
+    )
+    _queue_listener.start()
+    # 退出时先写出队列中的记录，再关闭缓冲处理器（关闭时刷新剩余记录）
+    atexit.unregister(_stop_queue_listener)
+    atexit.register(_stop_queue_listener)
     
     # 设置根日志级别
     root_logger.setLevel(log_level)
@@ -133,79 +356,98 @@ def setup_logging():
         logging.getLogger('core').setLevel(logging.DEBUG)
         logging.getLogger('services').setLevel(logging.DEBUG)
         
-        print("=" * 70)
-        print("🔧 开发模式日志系统已初始化")
-        print(f"📊 日志级别: {log_level_name}")
-        print(f"🌍 环境: {env}")
-        print(f"🐛 调试模式: {debug_mode}")
-        print(f"📁 日志目录: {os.path.abspath(log_dir)}")
-        print(f"📋 日志文件保留数量: 10")
-        print("=" * 70)
+        # 横幅一次性写出
+        separator = "=" * 70
+        sys.stdout.write("\n".join((
+            separator,
+            "🔧 开发模式日志系统已初始化",
+            f"📊 日志级别: {log_level_name}",
+            f"🌍 环境: {env}",
+            f"🐛 调试模式: {debug_mode}",
+            f"📁 日志目录: {os.path.abspath(log_dir)}",
+            "📋 日志文件保留数量: 10",
+            separator,
+        )) + "\n")
     
     return logging.getLogger(__name__)
 
 
-def _get_next_log_file(log_dir: str) -> str:
-    """获取下一个可用的日志文件名（按重启次数编号）"""
-    import datetime
-    today = datetime.datetime.now().strftime("%Y%m%d")
+def _get_next_log_file(log_dir: str, log_files: List[str]) -> str:
+    """获取下一个可用的日志文件名（按重启次数编号）
     
-    # 查找今天的日志文件
-    log_files = glob.glob(os.path.join(log_dir, f"tg_bot_{today}_*.log"))
+    Args:
+        log_dir: 日志目录
+        log_files: 清理旧日志时扫描到的日志文件，从中提取今天的最大序号，无需再次扫描目录
+    """
+    today = datetime.now().strftime("%Y%m%d")
+    prefix = f"tg_bot_{today}_"
     
     # 提取序号
     max_seq = 0
     for log_file in log_files:
         basename = os.path.basename(log_file)
-        parts = basename.split('_')
-        if len(parts) >= 4:
+        if basename.startswith(prefix):
             try:
-                seq = int(parts[3].split('.')[0])  # 去掉.log后缀
-                max_seq = max(max_seq, seq)
+                max_seq = max(max_seq, int(basename[len(prefix):].split('.')[0]))  # 去掉.log后缀
             except ValueError:
                 continue
     
     # 下一个序号
     next_seq = max_seq + 1
-    return os.path.join(log_dir, f"tg_bot_{today}_{next_seq:03d}.log")
+    return os.path.join(log_dir, f"{prefix}{next_seq:03d}.log")
 
 
-def _cleanup_old_logs(log_dir: str):
-    """清理旧的日志文件，只保留最新的10个"""
+def _cleanup_old_logs(log_dir: str) -> List[str]:
+    """清理旧的日志文件，只保留最新的10个
+    
+    Returns:
+        扫描到的全部日志文件（包括已删除的），供计算下一个重启序号
+    """
     log_files = glob.glob(os.path.join(log_dir, "tg_bot_*.log"))
     
     # 按修改时间排序
-    log_files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
+    by_mtime = sorted(log_files, key=lambda x: os.path.getmtime(x), reverse=True)
     
     # 删除超出10个的文件
-    for log_file in log_files[10:]:
+    for log_file in by_mtime[10:]:
         try:
             os.remove(log_file)
             print(f"已删除旧日志文件: {log_file}")
         except OSError:
             pass  # 忽略删除失败
+    
+    return log_files
+
+
+# 噪音较大的第三方库及其日志级别
+_NOISY_MODULES = (
+    ("pyrogram", logging.WARNING),
+    ("telethon", logging.WARNING),
+    ("pymongo", logging.WARNING),
+    ("urllib3", logging.WARNING),
+    ("httpx", logging.WARNING),
+    ("asyncio", logging.WARNING),
+    ("aiohttp", logging.WARNING),
+)
 
 
 def _optimize_third_party_logging():
-    """优化第三方库的日志级别"""
-    # 减少第三方库的日志噪音
-    noisy_modules = [
-        ("pyrogram", logging.WARNING),
-        ("telethon", logging.WARNING),
-        ("pymongo", logging.WARNING),
-        ("urllib3", logging.WARNING),
-        ("httpx", logging.WARNING),
-        ("asyncio", logging.WARNING),
-        ("aiohttp", logging.WARNING)
-    ]
-    
-    for module_name, level in noisy_modules:
+    """优化第三方库的日志级别
+    
+    在库级日志记录器上设置级别后，低于该级别的调用在 isEnabledFor 处即被丢弃，
+    不会创建日志记录，也不会进入处理器链。保留 propagate，使这些库的
+    WARNING 及以上记录仍写入应用的控制台和文件日志。
+    """
+    for module_name, level in _NOISY_MODULES:
         logging.getLogger(module_name).setLevel(level)
 
 
+@lru_cache(maxsize=1024)
 def get_logger(name: str) -> logging.Logger:
     """获取命名日志记录器
     
+    结果按名称缓存，模块级别的设置只在首次获取时执行一次。
+    
     Args:
         name: 日志记录器名称
         
@@ -239,22 +481,37 @@ def log_with_context(logger: logging.Logger, level: int, message: str,
         message_id: 消息ID
         **kwargs: 额外上下文
     """
-    # 创建日志记录
-    if logger.isEnabledFor(level):
-        record = logger.makeRecord(
-            logger.name, level, "", 0, message, (), None,
-            func=kwargs.get('func'), extra=kwargs
-        )
-        
-        # 添加上下文信息
-        if user_id:
-            record.user_id = user_id
-        if chat_id:
-            record.chat_id = chat_id
-        if message_id:
-            record.message_id = message_id
-        
-        logger.handle(record)
+    if not logger.isEnabledFor(level):
+        return
+    
+    # 上下文信息通过 extra 一次性写入日志记录
+    ctx = dict(kwargs)
+    if user_id:
+        ctx['user_id'] = user_id
+    if chat_id:
+        ctx['chat_id'] = chat_id
+    if message_id:
+        ctx['message_id'] = message_id
+    
+    # stacklevel=2 使 funcName/lineno 指向调用方
+    logger.log(level, message, extra=ctx, stacklevel=2)
+
+
+# 性能日志消息模板，参数在记录真正输出时才格式化
+_PERF_MSG = "%s %s - 耗时: %.2fms"
+_PERF_MSG_WITH_DETAILS = _PERF_MSG + " | 详情: %s"
+
+
+class _LazyJson:
+    """延迟序列化的JSON参数，仅在日志消息实际格式化时调用 _json_dumps"""
+    
+    __slots__ = ('data',)
+    
+    def __init__(self, data: Any):
+        self.data = data
+    
+    def __str__(self) -> str:
+        return _json_dumps(self.data)
 
 
 class PerformanceLogger:
@@ -283,19 +540,22 @@ class PerformanceLogger:
             details: 详细信息
         """
         level = logging.INFO if success else logging.ERROR
+        is_slow = duration_ms > self.performance_threshold_ms
         
-        # 构建性能消息
-        status = "✅" if success else "❌"
-        message = f"{status} {operation} - 耗时: {duration_ms:.2f}ms"
+        if not self.logger.isEnabledFor(level) and not is_slow:
+            return
         
+        # 记录性能日志，消息格式化和详情序列化推迟到处理器真正输出时
+        status = "✅" if success else "❌"
         if details:
-            message += f" | 详情: {json.dumps(details, ensure_ascii=False)}"
-        
-        # 记录日志
-        log_with_context(self.logger, level, message, user_id=user_id)
+            self.logger.log(level, _PERF_MSG_WITH_DETAILS, status, operation, duration_ms,
+                            _LazyJson(details), extra={'user_id': user_id})
+        else:
+            self.logger.log(level, _PERF_MSG, status, operation, duration_ms,
+                            extra={'user_id': user_id})
         
         # 记录慢操作警告
-        if duration_ms > self.performance_threshold_ms:
+        if is_slow:
             self.logger.warning("🐌 慢操作检测: %s 耗时 %.2fms", operation, duration_ms)
     
     def set_threshold(self, threshold_ms: float) -> None:
@@ -309,8 +569,3 @@ class PerformanceLogger:
 
 # 创建全局性能日志记录器
 performance_logger = PerformanceLogger(get_logger(__name__))
-
-
-def get_logger(name: str) -> logging.Logger:
-    """获取命名日志记录器"""
-    return logging.getLogger(name)
\ No newline at end of file
@@ -4,7 +4,7 @@ import re
 import os
 import time
 import math
-from datetime import datetime as dt
+import tempfile
 from typing import Optional
 from pyrogram.errors import FloodWait, InviteHashInvalid, InviteHashExpired, UserAlreadyParticipant
 
@@ -27,35 +27,50 @@ async def screenshot(video: str, duration: int, sender: int) -> Optional[str]:
         return user_thumb
     
     time_stamp = hhmmss(int(duration) // 2)
-    out = dt.now().isoformat("_", "seconds") + ".jpg"
+    # 在临时目录中创建唯一文件名，避免并发生成时按时间命名的文件互相覆盖
+    with tempfile.NamedTemporaryFile(
+        suffix=".jpg", prefix="thumb_", dir=file_manager.base_temp_dir, delete=False
+    ) as temp_file:
+        out = temp_file.name
     
+    # 输入端快速定位：只解码目标时间点之后的首个关键帧，无需解码之前的帧
     cmd = [
         "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-skip_frame",
+        "nokey",
+        "-noaccurate_seek",
         "-ss",
         f"{time_stamp}", 
         "-i",
         f"{video}",
         "-frames:v",
         "1", 
-        f"{out}",
-        "-y"
+        "-q:v",
+        "3",
+        f"{out}"
     ]
     
     try:
+        # 输出未被使用，直接丢弃，避免通过管道读取并缓存 ffmpeg 的日志
         process = await asyncio.create_subprocess_exec(
             *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
         )
-        stdout, stderr = await process.communicate()
+        await process.wait()
         
-        if file_manager.file_exists(out):
+        # 预先创建的文件始终存在，以是否写入内容判断是否生成成功
+        if file_manager.get_file_size(out) > 0:
             return out
-        else:
-            return None
     except Exception as e:
         logger.warning(f"生成缩略图失败: {e}")
-        return None
+    
+    file_manager.safe_remove(out)
+    return None
 
 
 async def progress_for_pyrogram(current: int, total: int, client, ud_type: str, message, start: float):
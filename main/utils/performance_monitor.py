@@ -3,6 +3,8 @@
 提供高级性能监控功能，包括实时监控、性能分析和瓶颈识别。
 """
 import time
+import heapq
+import functools
 import logging
 import threading
 import psutil
@@ -10,13 +12,17 @@ import asyncio
 from typing import Dict, Any, Callable, Optional, List
 from contextlib import contextmanager
 from dataclasses import dataclass
+from operator import attrgetter
 from datetime import datetime, timedelta
 from collections import deque
 
 logger = logging.getLogger(__name__)
 
+# 保留的性能记录数量上限
+_MAX_RECORDS = 1000
 
-@dataclass
+
+@dataclass(slots=True)
 class PerformanceRecord:
     """性能记录"""
     name: str
@@ -37,9 +43,23 @@ class PerformanceMonitor:
             enabled: 是否启用性能监控
         """
         self.enabled = enabled
-        self._records: Dict[str, PerformanceRecord] = {}
+        # 保持最近1000条记录，超出容量时自动丢弃最早的记录
+        self._records: deque = deque(maxlen=_MAX_RECORDS)
         self._lock = threading.Lock()
         self._threshold_ms = 1000  # 慢操作阈值（毫秒）
+        self._reset_aggregates()
+    
+    def _reset_aggregates(self):
+        """重置增量维护的统计量"""
+        self._duration_count = 0
+        self._sum_duration = 0.0
+        self._success_count = 0
+        self._slow_count = 0
+        self._max_duration = 0.0
+        self._min_duration = 0.0
+        self._last_start = 0.0
+        # 淘汰的记录恰好是最大/最小值时无法增量更新，标记后在读取时重新计算
+        self._extremes_dirty = False
         
     @contextmanager
     def measure(self, name: str):
@@ -55,7 +75,9 @@ class PerformanceMonitor:
             yield None
             return
             
+        # start_time/end_time 为墙上时间，用于展示；耗时基于单调时钟计算，不受系统时间调整影响
         record = PerformanceRecord(name=name, start_time=time.time())
+        start_ns = time.monotonic_ns()
         
         try:
             yield record
@@ -65,8 +87,8 @@ class PerformanceMonitor:
             record.error = str(e)
             raise
         finally:
+            record.duration = (time.monotonic_ns() - start_ns) / 1e6  # 转换为毫秒
             record.end_time = time.time()
-            record.duration = (record.end_time - record.start_time) * 1000  # 转换为毫秒
             
             self._add_record(record)
             
@@ -81,14 +103,56 @@ class PerformanceMonitor:
             record: 性能记录
         """
         with self._lock:
-            key = f"{record.name}_{int(record.start_time * 1000)}"
-            self._records[key] = record
+            records = self._records
+            if len(records) == records.maxlen:
+                self._remove_from_aggregates(records[0])
+            records.append(record)
+            
+            if record.success:
+                self._success_count += 1
+            if record.start_time > self._last_start:
+                self._last_start = record.start_time
             
-            # 保持最近1000条记录
-            if len(self._records) > 1000:
-                # 移除最早的记录
-                oldest_key = min(self._records.keys(), key=lambda k: self._records[k].start_time)
-                del self._records[oldest_key]
+            duration = record.duration
+            if duration is not None:
+                if self._duration_count == 0:
+                    self._max_duration = self._min_duration = duration
+                elif duration > self._max_duration:
+                    self._max_duration = duration
+                elif duration < self._min_duration:
+                    self._min_duration = duration
+                self._duration_count += 1
+                self._sum_duration += duration
+                if duration > self._threshold_ms:
+                    self._slow_count += 1
+    
+    def _remove_from_aggregates(self, record: PerformanceRecord):
+        """从统计量中扣除即将被淘汰的记录
+        
+        Args:
+            record: 被淘汰的性能记录
+        """
+        if record.success:
+            self._success_count -= 1
+        if record.start_time >= self._last_start:
+            self._extremes_dirty = True
+        
+        duration = record.duration
+        if duration is not None:
+            self._duration_count -= 1
+            self._sum_duration -= duration
+            if duration > self._threshold_ms:
+                self._slow_count -= 1
+            if duration >= self._max_duration or duration <= self._min_duration:
+                self._extremes_dirty = True
+    
+    def _recompute_extremes(self):
+        """重新计算最大/最小耗时和最近操作时间（仅在淘汰了极值记录后执行）"""
+        durations = [r.duration for r in self._records if r.duration is not None]
+        self._max_duration = max(durations) if durations else 0.0
+        self._min_duration = min(durations) if durations else 0.0
+        self._last_start = max((r.start_time for r in self._records), default=0.0)
+        self._extremes_dirty = False
     
     def get_statistics(self) -> Dict[str, Any]:
         """获取性能统计信息
@@ -97,20 +161,22 @@ class PerformanceMonitor:
             Dict[str, Any]: 统计信息
         """
         with self._lock:
-            if not self._records:
+            total = len(self._records)
+            if not total:
                 return {}
             
-            records = list(self._records.values())
-            durations = [r.duration for r in records if r.duration is not None]
+            if self._extremes_dirty:
+                self._recompute_extremes()
             
+            count = self._duration_count
             return {
-                'total_operations': len(records),
-                'success_rate': sum(1 for r in records if r.success) / len(records) * 100,
-                'avg_duration_ms': sum(durations) / len(durations) if durations else 0,
-                'max_duration_ms': max(durations) if durations else 0,
-                'min_duration_ms': min(durations) if durations else 0,
-                'slow_operations': sum(1 for d in durations if d > self._threshold_ms),
-                'last_operation': max(r.start_time for r in records) if records else 0
+                'total_operations': total,
+                'success_rate': self._success_count / total * 100,
+                'avg_duration_ms': self._sum_duration / count if count else 0,
+                'max_duration_ms': self._max_duration if count else 0,
+                'min_duration_ms': self._min_duration if count else 0,
+                'slow_operations': self._slow_count,
+                'last_operation': self._last_start
             }
     
     def get_top_slow_operations(self, limit: int = 10) -> list:
@@ -123,15 +189,18 @@ class PerformanceMonitor:
             list: 最慢操作列表
         """
         with self._lock:
-            slow_records = [r for r in self._records.values() 
-                          if r.duration and r.duration > self._threshold_ms]
-            slow_records.sort(key=lambda r: r.duration, reverse=True)
-            return slow_records[:limit]
+            threshold_ms = self._threshold_ms
+            return heapq.nlargest(
+                limit,
+                (r for r in self._records if r.duration and r.duration > threshold_ms),
+                key=attrgetter('duration')
+            )
     
     def reset(self):
         """重置性能记录"""
         with self._lock:
             self._records.clear()
+            self._reset_aggregates()
     
     def set_threshold(self, threshold_ms: int):
         """设置慢操作阈值
@@ -139,29 +208,47 @@ class PerformanceMonitor:
         Args:
             threshold_ms: 阈值（毫秒）
         """
-        self._threshold_ms = threshold_ms
+        with self._lock:
+            self._threshold_ms = threshold_ms
+            # 阈值变化后重新统计慢操作数量
+            self._slow_count = sum(
+                1 for r in self._records if r.duration is not None and r.duration > threshold_ms
+            )
 
 
 def performance_decorator(func: Callable) -> Callable:
     """性能监控装饰器
     
+    记录写入全局 performance_monitor，同时支持同步函数和协程函数。
+    
     Args:
         func: 被装饰的函数
         
     Returns:
         Callable: 装饰后的函数
     """
-    def wrapper(*args, **kwargs):
-        monitor = PerformanceMonitor()
-        func_name = f"{func.__module__}.{func.__name__}"
+    func_name = f"{func.__module__}.{func.__name__}"
+    
+    def _warn_if_slow(record: Optional[PerformanceRecord]) -> None:
+        # 如果函数执行时间超过阈值，记录警告
+        if record and record.duration and record.duration > performance_monitor._threshold_ms:
+            logger.warning("函数 %s 执行缓慢: %.2fms", func_name, record.duration)
+    
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with performance_monitor.measure(func_name) as record:
+                result = await func(*args, **kwargs)
+            _warn_if_slow(record)
+            return result
         
-        with monitor.measure(func_name) as record:
+        return async_wrapper
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with performance_monitor.measure(func_name) as record:
             result = func(*args, **kwargs)
-            
-        # 如果函数执行时间超过阈值，记录警告
-        if record and record.duration and record.duration > monitor._threshold_ms:
-            logger.warning(f"函数 {func_name} 执行缓慢: {record.duration:.2f}ms")
-            
+        _warn_if_slow(record)
         return result
     
     return wrapper
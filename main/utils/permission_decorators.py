@@ -4,13 +4,44 @@
 """
 import functools
 import logging
-from typing import Callable, Any, Optional
+import time
+from collections import deque
+from typing import Callable, Any, Deque, Dict, Optional
 from telethon import events
 
 from ..services.permission_service import permission_service
 
 logger = logging.getLogger(__name__)
 
+# 速率限制的时间窗口（秒）
+_RATE_LIMIT_WINDOW = 60.0
+
+# 各权限级别对应的检查方法名
+_PERMISSION_CHECKS = {
+    "owner": "require_owner",
+    "authorized": "require_authorized",
+}
+
+# 各权限级别的默认拒绝提示
+_PERMISSION_DENIED_MESSAGES = {
+    "owner": "❌ 此命令仅限所有者使用",
+    "authorized": "❌ 您没有权限使用此命令",
+}
+
+
+async def _check_permission(permission_level: str, user_id: int) -> bool:
+    """按权限级别调用 permission_service 的检查方法（结果由服务层缓存）
+    
+    Args:
+        permission_level: 权限级别
+        user_id: 用户ID
+        
+    Returns:
+        bool: 是否有权限
+    """
+    check = getattr(permission_service, _PERMISSION_CHECKS[permission_level])
+    return await check(user_id)
+
 
 def require_permission(permission_level: str, error_message: Optional[str] = None):
     """
@@ -26,25 +57,15 @@ def require_permission(permission_level: str, error_message: Optional[str] = Non
             user_id = event.sender_id
             
             # 检查权限
-            if permission_level == "owner":
-                has_permission = await permission_service.require_owner(user_id)
-                if not has_permission:
-                    msg = error_message or "❌ 此命令仅限所有者使用"
-                    await event.reply(msg)
-                    return
-            
-            elif permission_level == "authorized":
-                has_permission = await permission_service.require_authorized(user_id)
-                if not has_permission:
-                    msg = error_message or "❌ 您没有权限使用此命令"
-                    await event.reply(msg)
-                    return
-            
-            else:
-                logger.error(f"无效的权限级别: {permission_level}")
+            if permission_level not in _PERMISSION_CHECKS:
+                logger.error("无效的权限级别: %s", permission_level)
                 await event.reply("❌ 权限配置错误")
                 return
             
+            if not await _check_permission(permission_level, user_id):
+                await event.reply(error_message or _PERMISSION_DENIED_MESSAGES[permission_level])
+                return
+            
             # 执行原始函数
             return await func(event, *args, **kwargs)
         
@@ -63,6 +84,52 @@ def require_authorized(error_message: Optional[str] = None):
     return require_permission("authorized", error_message)
 
 
+class _RateLimiter:
+    """滑动窗口速率限制器，记录每个用户最近 _RATE_LIMIT_WINDOW 秒内的请求"""
+    
+    def __init__(self, requests_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        # 超限提示只需构建一次
+        self.limit_message = f"❌ 请求过于频繁，请稍后再试（限制: {requests_per_minute}次/分钟）"
+        # 存储用户请求时间戳（按时间先后排列）
+        self._user_requests: Dict[int, Deque[float]] = {}
+        # 上次清理空闲用户的时间
+        self._last_sweep = time.monotonic()
+    
+    def allow(self, user_id: int) -> bool:
+        """检查并记录一次请求
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            bool: 未超过限制时返回True并记录本次请求
+        """
+        user_requests = self._user_requests
+        current_time = time.monotonic()
+        
+        # 定期移除窗口内已无请求的用户，避免字典无限增长
+        if current_time - self._last_sweep >= _RATE_LIMIT_WINDOW:
+            for idle_user in [uid for uid, dq in user_requests.items()
+                              if not dq or current_time - dq[-1] >= _RATE_LIMIT_WINDOW]:
+                del user_requests[idle_user]
+            self._last_sweep = current_time
+        
+        # 从队头移除过期的请求记录，只保留最近60秒的记录
+        requests = user_requests.get(user_id)
+        if requests is None:
+            requests = user_requests[user_id] = deque()
+        while requests and current_time - requests[0] >= _RATE_LIMIT_WINDOW:
+            requests.popleft()
+        
+        if len(requests) >= self.requests_per_minute:
+            return False
+        
+        # 记录当前请求
+        requests.append(current_time)
+        return True
+
+
 def rate_limit(requests_per_minute: int = 30, error_message: Optional[str] = None):
     """
     速率限制装饰器
@@ -71,33 +138,16 @@ def rate_limit(requests_per_minute: int = 30, error_message: Optional[str] = Non
         requests_per_minute: 每分钟最大请求数
         error_message: 自定义错误消息
     """
-    import time
-    from collections import defaultdict
-    
-    # 存储用户请求时间戳
-    user_requests = defaultdict(list)
+    limiter = _RateLimiter(requests_per_minute)
     
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         async def wrapper(event: events.NewMessage.Event, *args, **kwargs):
-            user_id = event.sender_id
-            current_time = time.time()
-            
-            # 清理过期的请求记录
-            user_requests[user_id] = [
-                timestamp for timestamp in user_requests[user_id]
-                if current_time - timestamp < 60  # 只保留最近60秒的记录
-            ]
-            
             # 检查速率限制
-            if len(user_requests[user_id]) >= requests_per_minute:
-                msg = error_message or f"❌ 请求过于频繁，请稍后再试（限制: {requests_per_minute}次/分钟）"
-                await event.reply(msg)
+            if not limiter.allow(event.sender_id):
+                await event.reply(error_message or limiter.limit_message)
                 return
             
-            # 记录当前请求
-            user_requests[user_id].append(current_time)
-            
             # 执行原始函数
             return await func(event, *args, **kwargs)
         
@@ -118,14 +168,14 @@ def log_command_usage(command_name: str):
         async def wrapper(event: events.NewMessage.Event, *args, **kwargs):
             user_id = event.sender_id
             
-            logger.info(f"用户 {user_id} 执行命令: {command_name}")
+            logger.info("用户 %s 执行命令: %s", user_id, command_name)
             
             try:
                 result = await func(event, *args, **kwargs)
-                logger.info(f"命令 {command_name} 执行成功 (用户: {user_id})")
+                logger.info("命令 %s 执行成功 (用户: %s)", command_name, user_id)
                 return result
             except Exception as e:
-                logger.error(f"命令 {command_name} 执行失败 (用户: {user_id}): {e}")
+                logger.error("命令 %s 执行失败 (用户: %s): %s", command_name, user_id, e)
                 raise
         
         return wrapper
@@ -148,7 +198,7 @@ def handle_errors(default_return: Any = None, log_errors: bool = True):
                 return await func(event, *args, **kwargs)
             except Exception as e:
                 if log_errors:
-                    logger.error(f"命令执行出错: {func.__name__}, 错误: {e}", exc_info=True)
+                    logger.error("命令执行出错: %s, 错误: %s", func.__name__, e, exc_info=True)
                 
                 # 发送错误消息给用户
                 try:
@@ -178,6 +228,63 @@ def combined_decorator(*decorators):
     return decorator
 
 
+def build_command_wrapper(permission_level: Optional[str], requests_per_minute: Optional[int],
+                          command_name: str, default_return: Any = None):
+    """
+    构建融合的命令装饰器
+    
+    与依次叠加 require_permission、rate_limit、log_command_usage、handle_errors
+    的行为相同，但只生成一层包装函数，每次命令调用只有一次协程调用和 await。
+    
+    Args:
+        permission_level: 权限级别 ("owner"、"authorized")，None 表示不检查权限
+        requests_per_minute: 每分钟最大请求数，None 表示不限制
+        command_name: 命令名称
+        default_return: 出错时的默认返回值
+    """
+    if permission_level is not None and permission_level not in _PERMISSION_CHECKS:
+        raise ValueError(f"无效的权限级别: {permission_level}")
+    
+    limiter = _RateLimiter(requests_per_minute) if requests_per_minute else None
+    
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(event: events.NewMessage.Event, *args, **kwargs):
+            user_id = event.sender_id
+            
+            # 检查权限
+            if permission_level is not None and not await _check_permission(permission_level, user_id):
+                await event.reply(_PERMISSION_DENIED_MESSAGES[permission_level])
+                return
+            
+            # 检查速率限制
+            if limiter is not None and not limiter.allow(user_id):
+                await event.reply(limiter.limit_message)
+                return
+            
+            logger.info("用户 %s 执行命令: %s", user_id, command_name)
+            
+            try:
+                result = await func(event, *args, **kwargs)
+            except Exception as e:
+                logger.error("命令执行出错: %s, 错误: %s", func.__name__, e, exc_info=True)
+                
+                # 发送错误消息给用户
+                try:
+                    await event.reply("❌ 命令执行出错，请稍后重试")
+                except Exception:
+                    pass  # 忽略发送错误消息时的错误
+                
+                result = default_return
+            
+            logger.info("命令 %s 执行成功 (用户: %s)", command_name, user_id)
+            return result
+        
+        return wrapper
+    
+    return decorator
+
+
 # 预定义的装饰器组合
 class CommandDecorators:
     """预定义的装饰器组合"""
@@ -185,30 +292,17 @@ class CommandDecorators:
     @staticmethod
     def owner_command(command_name: str):
         """所有者命令装饰器组合"""
-        return combined_decorator(
-            require_owner(),
-            log_command_usage(command_name),
-            handle_errors()
-        )
+        return build_command_wrapper("owner", None, command_name)
     
     @staticmethod
     def authorized_command(command_name: str):
         """授权用户命令装饰器组合"""
-        return combined_decorator(
-            require_authorized(),
-            rate_limit(requests_per_minute=60),
-            log_command_usage(command_name),
-            handle_errors()
-        )
+        return build_command_wrapper("authorized", 60, command_name)
     
     @staticmethod
     def public_command(command_name: str):
         """公开命令装饰器组合"""
-        return combined_decorator(
-            rate_limit(requests_per_minute=30),
-            log_command_usage(command_name),
-            handle_errors()
-        )
+        return build_command_wrapper(None, 30, command_name)
 
 
 # 使用示例
@@ -20,7 +20,7 @@ def load_plugins(plugin_name: str) -> Any:
             # 重新加载模块
             module = sys.modules[module_name]
             importlib.reload(module)
-            logger.debug(f"重新加载插件: {plugin_name}")
+            logger.debug("重新加载插件: %s", plugin_name)
         else:
             # 首次加载模块
             spec = importlib.util.spec_from_file_location(module_name, path)
@@ -29,12 +29,12 @@ def load_plugins(plugin_name: str) -> Any:
             
             spec.loader.exec_module(module)
             sys.modules[module_name] = module
-            logger.debug(f"首次加载插件: {plugin_name}")
+            logger.debug("首次加载插件: %s", plugin_name)
         
-        logger.info(f"成功加载插件: {plugin_name}")
+        logger.debug("成功加载插件: %s", plugin_name)
         return module
     except Exception as e:
-        logger.error(f"加载插件 {plugin_name} 失败: {e}", exc_info=True)
+        logger.error("加载插件 %s 失败: %s", plugin_name, e, exc_info=True)
         raise
 
 
@@ -44,11 +44,11 @@ def unload_plugins(plugin_name: str) -> bool:
         module_name = f"main.plugins.{plugin_name}"
         if module_name in sys.modules:
             del sys.modules[module_name]
-            logger.info(f"成功卸载插件: {plugin_name}")
+            logger.info("成功卸载插件: %s", plugin_name)
             return True
         else:
-            logger.warning(f"插件未加载: {plugin_name}")
+            logger.warning("插件未加载: %s", plugin_name)
             return False
     except Exception as e:
-        logger.error(f"卸载插件 {plugin_name} 失败: {e}", exc_info=True)
+        logger.error("卸载插件 %s 失败: %s", plugin_name, e, exc_info=True)
         return False
\ No newline at end of file
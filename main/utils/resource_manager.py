@@ -3,16 +3,61 @@
 提供内存监控、资源清理和垃圾回收优化功能
 """
 import gc
+import os
+import re
+import time
 import psutil
 import asyncio
 import logging
 import weakref
-from typing import Dict, List, Any, Callable, Optional
+from typing import Dict, List, Any, Callable, Optional, Tuple
 from collections import defaultdict
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# /proc/meminfo 中的总内存和可用内存字段（单位 kB）
+_MEMINFO_RE = re.compile(rb"^(MemTotal|MemAvailable):\s+(\d+)", re.MULTILINE)
+# 常驻打开的 /proc/meminfo 文件描述符；None 表示尚未打开，-1 表示不可用
+_meminfo_fd: Optional[int] = None
+
+# 资源监控间隔（秒）：超过阈值 / 正常 / 内存使用率低于 _MEMORY_IDLE_RATIO
+_MONITOR_INTERVAL_HIGH = 10
+_MONITOR_INTERVAL_NORMAL = 60
+_MONITOR_INTERVAL_IDLE = 300
+_MEMORY_IDLE_RATIO = 0.5
+# 两次强制清理之间的最小间隔（秒）；清理后内存仍超过阈值时间隔加倍，直至上限
+_FORCE_CLEANUP_MIN_INTERVAL = 60
+_FORCE_CLEANUP_MAX_INTERVAL = 900
+# 年轻代回收后进程 RSS 仍高于回收前的该比例时，才升级为完整回收
+_FULL_GC_RSS_RATIO = 0.95
+
+
+def _read_memory_percent() -> float:
+    """读取系统内存使用率（0.0 - 1.0）
+    
+    Linux 上保持 /proc/meminfo 常驻打开，每次通过一次 pread 读取，
+    省去 psutil 每次 open/read/close 的开销；procfs 不支持 mmap，
+    从偏移 0 读取即可获得最新内容。其他平台或读取失败时回退到 psutil。
+    """
+    global _meminfo_fd
+    if _meminfo_fd is None:
+        try:
+            _meminfo_fd = os.open("/proc/meminfo", os.O_RDONLY)
+        except OSError:
+            _meminfo_fd = -1
+    
+    if _meminfo_fd >= 0:
+        try:
+            fields = dict(_MEMINFO_RE.findall(os.pread(_meminfo_fd, 4096, 0)))
+            total = int(fields[b"MemTotal"])
+            if total > 0:
+                return (total - int(fields[b"MemAvailable"])) / total
+        except (OSError, KeyError, ValueError):
+            pass
+    
+    return psutil.virtual_memory().percent / 100.0
+
 
 class ResourceManager:
     """资源管理器"""
@@ -20,12 +65,20 @@ class ResourceManager:
     def __init__(self, memory_threshold: float = 0.85, gc_threshold: int = 100):
         self.memory_threshold = memory_threshold
         self.gc_threshold = gc_threshold
-        self._tracked_resources: Dict[str, Any] = {}
-        self._cleanup_handlers: Dict[str, Callable] = {}
+        # 对象被回收时自动移除，无需周期性扫描失效的弱引用
+        self._tracked_resources: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        # 资源ID -> 资源回收时触发清理处理程序的 finalizer
+        self._cleanup_handlers: Dict[str, weakref.finalize] = {}
+        # 资源回收时产生、等待在事件循环中执行的异步清理处理程序
+        self._pending_cleanups: List[Tuple[str, weakref.ref, Callable]] = []
         self._last_cleanup = datetime.now()
         self._cleanup_interval = timedelta(minutes=5)
         self._monitor_task: Optional[asyncio.Task] = None
+        self._process = psutil.Process()
         self._is_monitoring = False
+        # 下一次允许强制清理的时间（time.monotonic）及当前退避间隔
+        self._next_force_cleanup = 0.0
+        self._force_cleanup_backoff = _FORCE_CLEANUP_MIN_INTERVAL
     
     async def start_monitoring(self):
         """开始资源监控"""
@@ -55,30 +108,59 @@ class ResourceManager:
         """监控循环"""
         while self._is_monitoring:
             try:
-                await self._check_memory_usage()
+                memory_percent = await self._check_memory_usage()
                 await self._perform_cleanup()
-                await asyncio.sleep(60)  # 每分钟检查一次
+                await asyncio.sleep(self._next_check_interval(memory_percent))
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"资源监控出错: {e}")
                 await asyncio.sleep(30)
     
-    async def _check_memory_usage(self):
-        """检查内存使用情况"""
+    def _next_check_interval(self, memory_percent: Optional[float]) -> float:
+        """根据内存使用率计算下一次检查的间隔（秒）
+        
+        内存紧张时缩短间隔以便及时清理，空闲时拉长间隔减少唤醒次数。
+        """
+        if memory_percent is None:
+            return _MONITOR_INTERVAL_NORMAL
+        if memory_percent > self.memory_threshold:
+            return _MONITOR_INTERVAL_HIGH
+        if memory_percent > _MEMORY_IDLE_RATIO:
+            return _MONITOR_INTERVAL_NORMAL
+        return _MONITOR_INTERVAL_IDLE
+    
+    async def _check_memory_usage(self) -> Optional[float]:
+        """检查内存使用情况
+        
+        Returns:
+            Optional[float]: 内存使用率，读取失败时返回None
+        """
         try:
-            memory_percent = psutil.virtual_memory().percent / 100.0
+            memory_percent = _read_memory_percent()
             
-            if memory_percent > self.memory_threshold:
+            if memory_percent <= self.memory_threshold:
+                self._force_cleanup_backoff = _FORCE_CLEANUP_MIN_INTERVAL
+            elif time.monotonic() >= self._next_force_cleanup:
                 logger.warning(f"内存使用率过高: {memory_percent:.1%}，触发清理")
-                await self._force_cleanup()
+                remaining = await self._force_cleanup()
+                self._next_force_cleanup = time.monotonic() + self._force_cleanup_backoff
+                if remaining > self.memory_threshold:
+                    # 清理未能降低内存使用，延长下一次强制清理的间隔
+                    self._force_cleanup_backoff = min(
+                        self._force_cleanup_backoff * 2, _FORCE_CLEANUP_MAX_INTERVAL
+                    )
+                    logger.warning(
+                        f"强制清理后内存使用率仍为 {remaining:.1%}，"
+                        f"{self._force_cleanup_backoff} 秒内不再强制清理"
+                    )
             
-            # 记录内存使用情况（每分钟记录一次）
-            if datetime.now().minute % 1 == 0:  # 每分钟记录一次
-                logger.debug(f"当前内存使用率: {memory_percent:.1%}")
+            logger.debug("当前内存使用率: %.1f%%", memory_percent * 100)
+            return memory_percent
                 
         except Exception as e:
             logger.error(f"检查内存使用情况出错: {e}")
+            return None
     
     async def _perform_cleanup(self):
         """执行定期清理"""
@@ -87,109 +169,105 @@ class ResourceManager:
             await self._cleanup_resources()
             self._last_cleanup = now
     
-    async def _force_cleanup(self):
-        """强制清理资源"""
+    async def _force_cleanup(self) -> float:
+        """强制清理资源
+        
+        Returns:
+            float: 清理后的内存使用率
+        """
         logger.info("执行强制资源清理")
         
         # 清理未引用的资源
         await self._cleanup_resources()
         
-        # 强制执行垃圾回收
-        gc.collect()
-        
-        # 清理asyncio事件循环
-        await self._cleanup_event_loop()
+        # 先回收年轻代，本进程 RSS 下降不明显时才执行停顿更长的完整回收；
+        # 以进程 RSS 而非系统内存判断，其他进程造成的内存压力不会触发完整回收
+        rss_before = self._process.memory_info().rss
+        gc.collect(1)
+        if self._process.memory_info().rss > rss_before * _FULL_GC_RSS_RATIO:
+            gc.collect(2)
+        return _read_memory_percent()
     
     async def _cleanup_resources(self):
-        """清理已注册的资源"""
-        removed_count = 0
+        """执行已回收资源的异步清理处理程序
         
-        for resource_id, resource in list(self._tracked_resources.items()):
-            # 检查资源是否仍然有效
-            if not self._is_resource_alive(resource):
-                # 执行清理处理程序
-                if resource_id in self._cleanup_handlers:
-                    try:
-                        handler = self._cleanup_handlers[resource_id]
-                        if asyncio.iscoroutinefunction(handler):
-                            await handler(resource)
-                        else:
-                            handler(resource)
-                    except Exception as e:
-                        logger.error(f"清理资源 {resource_id} 时出错: {e}")
-                
-                # 移除资源
-                del self._tracked_resources[resource_id]
-                if resource_id in self._cleanup_handlers:
-                    del self._cleanup_handlers[resource_id]
-                
-                removed_count += 1
+        同步处理程序在资源回收时由 finalizer 直接执行，这里只处理排队的协程处理程序。
+        """
+        pending, self._pending_cleanups = self._pending_cleanups, []
+        if not pending:
+            return
+        
+        # 并发执行所有处理程序，总耗时取决于最慢的一个而非耗时之和
+        results = await asyncio.gather(
+            *(handler(weak_resource) for _, weak_resource, handler in pending),
+            return_exceptions=True
+        )
+        
+        for (resource_id, _, _), result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.error(f"清理资源 {resource_id} 时出错: {result}")
         
-        if removed_count > 0:
-            logger.info(f"清理了 {removed_count} 个无效资源")
+        logger.info(f"清理了 {len(pending)} 个无效资源")
     
-    async def _cleanup_event_loop(self):
-        """清理asyncio事件循环"""
+    def _on_resource_collected(self, resource_id: str, weak_resource: weakref.ref, handler: Callable):
+        """资源被垃圾回收时由 weakref.finalize 调用
+        
+        Args:
+            resource_id: 资源ID
+            weak_resource: 指向已回收资源的弱引用
+            handler: 清理处理程序，以该弱引用为参数
+        """
+        self._cleanup_handlers.pop(resource_id, None)
+        
+        if asyncio.iscoroutinefunction(handler):
+            # finalizer 在同步上下文中执行，协程处理程序留给监控循环执行
+            self._pending_cleanups.append((resource_id, weak_resource, handler))
+            return
+        
         try:
-            # 获取当前事件循环
-            loop = asyncio.get_event_loop()
-            
-            # 清理已完成的任务
-            completed_tasks = [task for task in asyncio.all_tasks(loop) if task.done()]
-            for task in completed_tasks:
-                if not task.cancelled():
-                    try:
-                        task.result()  # 获取结果以清除异常
-                    except Exception:
-                        pass  # 忽略已完成任务的异常
-            
-            logger.debug(f"清理了 {len(completed_tasks)} 个已完成任务")
-            
+            handler(weak_resource)
         except Exception as e:
-            logger.error(f"清理事件循环出错: {e}")
-    
-    def _is_resource_alive(self, resource: Any) -> bool:
-        """检查资源是否仍然有效"""
-        try:
-            # 对于弱引用，检查是否仍然指向有效对象
-            if isinstance(resource, weakref.ReferenceType):
-                return resource() is not None
-            
-            # 对于其他对象，尝试访问简单属性
-            if hasattr(resource, '__class__'):
-                return True
-            
-            return False
-        except Exception:
-            return False
+            logger.error(f"清理资源 {resource_id} 时出错: {e}")
     
     def track_resource(self, resource_id: str, resource: Any, cleanup_handler: Optional[Callable] = None):
-        """跟踪资源"""
-        # 使用弱引用避免内存泄漏
-        weak_resource = weakref.ref(resource)
-        self._tracked_resources[resource_id] = weak_resource
+        """跟踪资源
+        
+        Args:
+            resource_id: 资源ID
+            resource: 被跟踪的对象（仅持有弱引用）
+            cleanup_handler: 对象被回收后调用的处理程序，与之前一样以资源的
+                弱引用为参数（调用时对象已回收，弱引用返回None）
+        """
+        # 重复跟踪同一ID时，取消旧资源的清理处理程序
+        previous = self._cleanup_handlers.pop(resource_id, None)
+        if previous is not None:
+            previous.detach()
+        self._tracked_resources[resource_id] = resource
         
         if cleanup_handler:
-            self._cleanup_handlers[resource_id] = cleanup_handler
+            self._cleanup_handlers[resource_id] = weakref.finalize(
+                resource, self._on_resource_collected, resource_id,
+                weakref.ref(resource), cleanup_handler
+            )
         
         logger.debug(f"开始跟踪资源: {resource_id}")
     
     def untrack_resource(self, resource_id: str):
         """停止跟踪资源"""
-        if resource_id in self._tracked_resources:
-            del self._tracked_resources[resource_id]
-        if resource_id in self._cleanup_handlers:
-            del self._cleanup_handlers[resource_id]
+        self._tracked_resources.pop(resource_id, None)
+        finalizer = self._cleanup_handlers.pop(resource_id, None)
+        if finalizer is not None:
+            finalizer.detach()
         
         logger.debug(f"停止跟踪资源: {resource_id}")
     
     def get_resource_stats(self) -> Dict[str, Any]:
         """获取资源统计信息"""
-        alive_count = sum(1 for resource in self._tracked_resources.values() 
-                         if self._is_resource_alive(resource))
+        # 已回收的资源会被自动移除，跟踪中的资源均为存活状态
+        alive_count = len(self._tracked_resources)
         
         return {
-            "total_tracked": len(self._tracked_resources),
+            "total_tracked": alive_count,
             "alive_resources": alive_count,
             "cleanup_handlers": len(self._cleanup_handlers),
             "last_cleanup": self._last_cleanup,
@@ -210,6 +288,10 @@ class MemoryOptimizer:
         if hasattr(gc, 'enable'):
             gc.enable()
         
+        # 将启动阶段创建的长期对象移入永久代，后续回收不再扫描它们
+        gc.collect()
+        gc.freeze()
+        
         logger.info("垃圾回收设置已优化")
     
     @staticmethod
@@ -5,12 +5,18 @@
 import asyncio
 import functools
 import logging
+import os
 import random
-from typing import Callable, Any, Optional, Union, List, Type
-from datetime import datetime, timedelta
+import time
+from typing import Callable, Any, Optional, Union, List, Tuple, Type
 
 logger = logging.getLogger(__name__)
 
+# 抖动专用的随机数生成器；fork 后在子进程中重新播种，避免多个工作进程产生相同的退避序列
+_jitter_random = random.Random()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_jitter_random.seed)
+
 
 class RetryStrategy:
     """重试策略配置"""
@@ -29,7 +35,8 @@ class RetryStrategy:
         self.max_delay = max_delay
         self.exponential_base = exponential_base
         self.jitter = jitter
-        self.retry_on_exceptions = retry_on_exceptions or [Exception]
+        # isinstance/except 可直接使用元组，无需逐个比较
+        self.retry_on_exceptions: Tuple[Type[BaseException], ...] = tuple(retry_on_exceptions or (Exception,))
     
     def get_delay(self, attempt: int) -> float:
         """计算重试延迟时间"""
@@ -39,8 +46,8 @@ class RetryStrategy:
         )
         
         if self.jitter:
-            # 添加随机抖动，避免重试风暴
-            delay = delay * (0.5 + random.random() * 0.5)
+            # 完全抖动（full jitter）：在 [0, delay] 内均匀取值，最大程度分散并发重试
+            delay = _jitter_random.uniform(0, delay)
         
         return delay
 
@@ -52,7 +59,8 @@ def retry(
     exponential_base: float = 2.0,
     jitter: bool = True,
     retry_on_exceptions: Optional[List[Type[Exception]]] = None,
-    on_retry: Optional[Callable[[Exception, int], None]] = None
+    on_retry: Optional[Callable[[Exception, int], None]] = None,
+    max_concurrency: Optional[int] = None
 ):
     """
     重试装饰器
@@ -65,6 +73,8 @@ def retry(
         jitter: 是否添加随机抖动
         retry_on_exceptions: 重试的异常类型列表
         on_retry: 重试回调函数
+        max_concurrency: 被装饰的协程函数同时执行的最大调用数（隔舱），None 表示不限制；
+            依赖故障时限制并发重试，避免放大下游压力。对同步函数无效
     """
     strategy = RetryStrategy(
         max_retries=max_retries,
@@ -75,26 +85,30 @@ def retry(
         retry_on_exceptions=retry_on_exceptions
     )
     
+    retry_on = strategy.retry_on_exceptions
+    
     def decorator(func: Callable) -> Callable:
+        is_coroutine = asyncio.iscoroutinefunction(func)
+        # 每个被装饰函数独享一个信号量；Semaphore 在首次使用时才绑定事件循环
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency and is_coroutine else None
+        
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
             last_exception = None
             
             for attempt in range(strategy.max_retries + 1):
                 try:
-                    if asyncio.iscoroutinefunction(func):
+                    # 仅用于协程函数（见下方的包装器选择）
+                    if semaphore is None:
+                        return await func(*args, **kwargs)
+                    # 只在调用期间占用名额，退避等待时不占用
+                    async with semaphore:
                         return await func(*args, **kwargs)
-                    else:
-                        return func(*args, **kwargs)
                 
-                except Exception as e:
+                except retry_on as e:
+                    # 不在重试范围内的异常不会被捕获，直接向上抛出
                     last_exception = e
                     
-                    # 检查是否是需要重试的异常
-                    if not any(isinstance(e, exc_type) for exc_type in strategy.retry_on_exceptions):
-                        logger.debug(f"异常 {type(e).__name__} 不在重试范围内，直接抛出")
-                        raise
-                    
                     # 检查是否达到最大重试次数
                     if attempt == strategy.max_retries:
                         logger.warning(f"函数 {func.__name__} 重试 {attempt} 次后失败: {e}")
@@ -129,14 +143,10 @@ def retry(
                 try:
                     return func(*args, **kwargs)
                 
-                except Exception as e:
+                except retry_on as e:
+                    # 不在重试范围内的异常不会被捕获，直接向上抛出
                     last_exception = e
                     
-                    # 检查是否是需要重试的异常
-                    if not any(isinstance(e, exc_type) for exc_type in strategy.retry_on_exceptions):
-                        logger.debug(f"异常 {type(e).__name__} 不在重试范围内，直接抛出")
-                        raise
-                    
                     # 检查是否达到最大重试次数
                     if attempt == strategy.max_retries:
                         logger.warning(f"函数 {func.__name__} 重试 {attempt} 次后失败: {e}")
@@ -158,14 +168,13 @@ def retry(
                             logger.error(f"重试回调函数出错: {callback_error}")
                     
                     # 等待延迟时间（同步版本）
-                    import time
                     time.sleep(delay)
             
             # 这行代码理论上不会执行
             raise last_exception
         
         # 根据函数类型返回相应的包装器
-        if asyncio.iscoroutinefunction(func):
+        if is_coroutine:
             return async_wrapper
         else:
             return sync_wrapper
@@ -223,6 +232,9 @@ def retry_with_backoff(
     """
     带退避策略的重试函数
     
+    func 为协程函数时返回可等待对象（由 retry_with_backoff_async 实现），
+    调用方需要 await；否则同步执行并返回结果。
+    
     Args:
         func: 要重试的函数
         max_retries: 最大重试次数
@@ -232,6 +244,32 @@ def retry_with_backoff(
     Returns:
         函数执行结果
     
+    Raises:
+        最后一次重试的异常
+    """
+    if asyncio.iscoroutinefunction(func):
+        return retry_with_backoff_async(func, *args, max_retries=max_retries, **kwargs)
+    return retry_with_backoff_sync(func, *args, max_retries=max_retries, **kwargs)
+
+
+async def retry_with_backoff_async(
+    func: Callable,
+    *args,
+    max_retries: int = 3,
+    **kwargs
+) -> Any:
+    """
+    带退避策略的异步重试函数，等待期间不阻塞事件循环
+    
+    Args:
+        func: 要重试的协程函数
+        max_retries: 最大重试次数
+        *args: 函数参数
+        **kwargs: 函数关键字参数
+    
+    Returns:
+        函数执行结果
+    
     Raises:
         最后一次重试的异常
     """
@@ -239,10 +277,7 @@ def retry_with_backoff(
     
     for attempt in range(strategy.max_retries + 1):
         try:
-            if asyncio.iscoroutinefunction(func):
-                return asyncio.run(func(*args, **kwargs))
-            else:
-                return func(*args, **kwargs)
+            return await func(*args, **kwargs)
         
         except Exception as e:
             if attempt == strategy.max_retries:
@@ -251,55 +286,159 @@ def retry_with_backoff(
             
             delay = strategy.get_delay(attempt + 1)
             logger.warning(f"函数 {func.__name__} 第 {attempt + 1} 次重试，等待 {delay:.2f} 秒")
+            await asyncio.sleep(delay)
+
+
+def retry_with_backoff_sync(
+    func: Callable,
+    *args,
+    max_retries: int = 3,
+    **kwargs
+) -> Any:
+    """
+    带退避策略的同步重试函数
+    
+    Args:
+        func: 要重试的函数
+        max_retries: 最大重试次数
+        *args: 函数参数
+        **kwargs: 函数关键字参数
+    
+    Returns:
+        函数执行结果
+    
+    Raises:
+        最后一次重试的异常
+    """
+    strategy = RetryStrategy(max_retries=max_retries)
+    
+    for attempt in range(strategy.max_retries + 1):
+        try:
+            return func(*args, **kwargs)
+        
+        except Exception as e:
+            if attempt == strategy.max_retries:
+                logger.error(f"函数 {func.__name__} 重试 {attempt} 次后失败")
+                raise
             
-            if asyncio.iscoroutinefunction(func):
-                asyncio.sleep(delay)
-            else:
-                import time
-                time.sleep(delay)
+            delay = strategy.get_delay(attempt + 1)
+            logger.warning(f"函数 {func.__name__} 第 {attempt + 1} 次重试，等待 {delay:.2f} 秒")
+            time.sleep(delay)
+
+
+def _is_downstream_failure(error: Exception) -> bool:
+    """断路器默认的失败判定：连接错误和超时"""
+    return isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError))
 
 
 class CircuitBreaker:
     """断路器模式实现"""
     
-    def __init__(self, failure_threshold: int = 5, timeout: float = 60.0):
+    def __init__(self, failure_threshold: int = 5, timeout: float = 60.0,
+                 half_open_requests: int = 1, success_threshold: int = 1,
+                 count_as_failure: Optional[Callable[[Exception], bool]] = None):
+        """初始化断路器
+        
+        Args:
+            failure_threshold: 连续失败多少次后打开断路器
+            timeout: 打开后经过多少秒进入半开状态
+            half_open_requests: 半开状态下允许同时进行的探测调用数
+            success_threshold: 半开状态下需要连续成功多少次才完全关闭
+            count_as_failure: 判断异常是否计为失败的函数，默认只统计连接错误和超时
+        """
         self.failure_threshold = failure_threshold
         self.timeout = timeout
+        self.success_threshold = success_threshold
+        # 只有下游故障才应触发断路器，调用方错误（如参数无效）不计入失败
+        self.count_as_failure = count_as_failure or _is_downstream_failure
         self.failure_count = 0
-        self.last_failure_time = None
+        self.success_count = 0
+        self.last_failure_time = 0.0  # time.monotonic() 时间戳
         self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
+        # 保护状态转换，避免并发调用同时改写状态和计数
+        self._lock = asyncio.Lock()
+        # 限制半开状态下的并发探测数量
+        self._half_open_sema = asyncio.Semaphore(half_open_requests)
+        # 打开后由定时器在 timeout 秒后置位，被拒绝的调用只需检查该事件
+        self._half_open_event = asyncio.Event()
+        self._half_open_timer: Optional[asyncio.TimerHandle] = None
+    
+    def _open(self):
+        """切换到打开状态，并安排 timeout 秒后允许进入半开状态"""
+        self.state = "OPEN"
+        self.success_count = 0
+        self._half_open_event.clear()
+        if self._half_open_timer is not None:
+            self._half_open_timer.cancel()
+        self._half_open_timer = asyncio.get_running_loop().call_later(
+            self.timeout, self._half_open_event.set
+        )
     
     async def call(self, func: Callable, *args, **kwargs):
         """通过断路器调用函数"""
-        if self.state == "OPEN":
-            # 检查是否应该尝试半开状态
-            if (datetime.now() - self.last_failure_time).total_seconds() > self.timeout:
+        # 快速失败：打开期间无需获取锁
+        if self.state == "OPEN" and not self._half_open_event.is_set():
+            raise CircuitBreakerOpen(f"断路器已打开，拒绝调用 {func.__name__}")
+        
+        async with self._lock:
+            if self.state == "OPEN":
+                # 等待锁期间可能已被重新打开
+                if not self._half_open_event.is_set():
+                    raise CircuitBreakerOpen(f"断路器已打开，拒绝调用 {func.__name__}")
                 self.state = "HALF_OPEN"
-            else:
-                raise CircuitBreakerOpen(f"断路器已打开，拒绝调用 {func.__name__}")
+                self.success_count = 0
+            probing = self.state == "HALF_OPEN"
         
+        if not probing:
+            return await self._execute(func, args, kwargs, probing=False)
+        
+        # 探测名额已用完时直接拒绝，而不是排队等待后再冲击下游服务
+        if self._half_open_sema.locked():
+            raise CircuitBreakerOpen(f"断路器半开探测中，拒绝调用 {func.__name__}")
+        async with self._half_open_sema:
+            return await self._execute(func, args, kwargs, probing=True)
+    
+    async def _execute(self, func: Callable, args: tuple, kwargs: dict, probing: bool):
+        """执行调用并根据结果更新断路器状态
+        
+        Args:
+            func: 被调用的函数
+            args: 位置参数
+            kwargs: 关键字参数
+            probing: 是否为半开状态下的探测调用
+        """
         try:
             if asyncio.iscoroutinefunction(func):
                 result = await func(*args, **kwargs)
             else:
                 result = func(*args, **kwargs)
-            
-            # 调用成功，重置断路器
-            if self.state == "HALF_OPEN":
-                self.state = "CLOSED"
-            self.failure_count = 0
-            
-            return result
-        
         except Exception as e:
-            self.failure_count += 1
-            self.last_failure_time = datetime.now()
-            
-            if self.failure_count >= self.failure_threshold:
-                self.state = "OPEN"
+            if not self.count_as_failure(e):
+                raise
             
-            logger.error(f"断路器状态: {self.state}, 失败次数: {self.failure_count}")
+            async with self._lock:
+                self.failure_count += 1
+                self.last_failure_time = time.monotonic()
+                
+                # 半开状态下任何一次失败都立即重新打开
+                if self.state == "HALF_OPEN" or self.failure_count >= self.failure_threshold:
+                    self._open()
+                
+                logger.error(f"断路器状态: {self.state}, 失败次数: {self.failure_count}")
             raise
+        
+        async with self._lock:
+            if probing and self.state == "HALF_OPEN":
+                # 连续成功达到阈值后才完全关闭
+                self.success_count += 1
+                if self.success_count >= self.success_threshold:
+                    self.state = "CLOSED"
+                    self.success_count = 0
+                    self.failure_count = 0
+            elif self.state == "CLOSED":
+                self.failure_count = 0
+        
+        return result
 
 
 class CircuitBreakerOpen(Exception):
@@ -4,70 +4,83 @@
 """
 import logging
 import re
-from typing import Any, Dict, List, Pattern
+import sys
+from typing import Any, Dict
 from logging import LogRecord
 
 
+# 脱敏后长度低于此值的消息会被驻留（sys.intern）
+_INTERN_MAX_LENGTH = 64
+
+# 敏感信息匹配模式：(正则, 脱敏标签)，每个正则包含前缀和敏感值两个分组
+# SESSION字符串模式（Telegram SESSION字符串通常是base64格式）
+_SESSION_PATTERNS = [
+    (r'(session[\s=:"\']+)([A-Za-z0-9+/]{40,}={0,2})', "SESSION"),  # base64格式
+    (r'(1[\s=:"\']+)([A-Za-z0-9+/]{40,}={0,2})', "SESSION"),        # 以1开头的SESSION
+]
+
+# API密钥和令牌模式
+_API_PATTERNS = [
+    (r'(api[_-]?key[\s=:"\']+)([A-Za-z0-9]{32,64})', "API_KEY"),         # API密钥
+    (r'(bot[\s]*token[\s=:"\']+)([0-9]+:[A-Za-z0-9_-]{35})', "BOT_TOKEN"),  # Bot Token
+    (r'(token[\s=:"\']+)([A-Za-z0-9]{32,64})', "API_KEY"),                # 通用令牌
+]
+
+# 数据库连接字符串
+_DB_PATTERNS = [
+    (r'(mongodb[\s=:"\']+)([^\s"\']+)', "DB_CONNECTION"),   # MongoDB连接字符串
+    (r'(username[\s=:"\']+)([^\s"\']+)', "SENSITIVE_DATA"),  # 用户名
+    (r'(password[\s=:"\']+)([^\s"\']+)', "SENSITIVE_DATA"),  # 密码
+    (r'(host[\s=:"\']+)([^\s"\']+)', "SENSITIVE_DATA"),      # 主机
+    (r'(port[\s=:"\']+)([0-9]+)', "SENSITIVE_DATA"),         # 端口
+]
+
+# 加密密钥
+_ENCRYPTION_PATTERNS = [
+    (r'(encryption[\s]*key[\s=:"\']+)([A-Za-z0-9]{32,64})', "API_KEY"),  # 加密密钥
+    (r'(secret[\s=:"\']+)([A-Za-z0-9]{32,64})', "API_KEY"),              # 密钥
+]
+
+# 用户敏感信息
+_USER_PATTERNS = [
+    (r'(phone[\s=:"\']+)(\+?[0-9]{10,15})', "PHONE"),  # 手机号
+    (r'(email[\s=:"\']+)([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,})', "EMAIL"),  # 邮箱
+    (r'(user[\s]*id[\s=:"\']+)([0-9]+)', "SENSITIVE_DATA"),  # 用户ID
+]
+
+# 合并所有模式
+_ALL_PATTERNS = (
+    _SESSION_PATTERNS + 
+    _API_PATTERNS + 
+    _DB_PATTERNS + 
+    _ENCRYPTION_PATTERNS + 
+    _USER_PATTERNS
+)
+
+# 预编译的 (正则, 替换模板)，只在模块加载时编译一次。
+# 各模式按顺序依次替换：前一个模式替换后，后面的模式仍能匹配剩余文本，
+# 合并成单个正则时先命中的分支会吞掉后续模式需要的文本而漏掉敏感值
+_COMPILED_PATTERNS = [
+    (re.compile(pattern, re.IGNORECASE), rf"\g<1>[REDACTED:{label}]")
+    for pattern, label in _ALL_PATTERNS
+]
+
+# 每个模式前缀中必然出现的关键字（小写）；消息不含任何关键字时无需执行正则
+_PRESCREEN_KEYWORDS = (
+    'session', 'key', 'token', 'mongodb', 'username', 'password',
+    'host', 'port', 'secret', 'phone', 'email', 'user',
+)
+# "1" 开头的 SESSION 模式要求紧跟分隔符；只预筛 "1" 会命中几乎所有日志，
+# 因此展开为 "1" + 分隔符（与正则 [\s=:"'] 一致，包括 Unicode 空白）
+_PRESCREEN_SESSION_PREFIXES = tuple(
+    '1' + sep
+    for sep in '=:"\'' + ''.join(c for c in map(chr, range(0x3001)) if c.isspace())
+)
+
+
 class SensitiveFilter(logging.Filter):
     """敏感信息日志过滤器"""
     
-    def __init__(self, name: str = ""):
-        super().__init__(name)
-        self._sensitive_patterns: List[Pattern] = []
-        self._initialize_patterns()
-    
-    def _initialize_patterns(self):
-        """初始化敏感信息匹配模式"""
-        # SESSION字符串模式（Telegram SESSION字符串通常是base64格式）
-        session_patterns = [
-            r'(session[\s=:"\']+)([A-Za-z0-9+/]{40,}={0,2})',  # base64格式
-            r'(1[\s=:"\']+)([A-Za-z0-9+/]{40,}={0,2})',      # 以1开头的SESSION
-        ]
-        
-        # API密钥和令牌模式
-        api_patterns = [
-            r'(api[_-]?key[\s=:"\']+)([A-Za-z0-9]{32,64})',      # API密钥
-            r'(bot[\s]*token[\s=:"\']+)([0-9]+:[A-Za-z0-9_-]{35})',  # Bot Token
-            r'(token[\s=:"\']+)([A-Za-z0-9]{32,64})',               # 通用令牌
-        ]
-        
-        # 数据库连接字符串
-        db_patterns = [
-            r'(mongodb[\s=:"\']+)([^\s"\']+)',              # MongoDB连接字符串
-            r'(username[\s=:"\']+)([^\s"\']+)',             # 用户名
-            r'(password[\s=:"\']+)([^\s"\']+)',             # 密码
-            r'(host[\s=:"\']+)([^\s"\']+)',                 # 主机
-            r'(port[\s=:"\']+)([0-9]+)',                    # 端口
-        ]
-        
-        # 加密密钥
-        encryption_patterns = [
-            r'(encryption[\s]*key[\s=:"\']+)([A-Za-z0-9]{32,64})',  # 加密密钥
-            r'(secret[\s=:"\']+)([A-Za-z0-9]{32,64})',              # 密钥
-        ]
-        
-        # 用户敏感信息
-        user_patterns = [
-            r'(phone[\s=:"\']+)(\+?[0-9]{10,15})',          # 手机号
-            r'(email[\s=:"\']+)([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,})',  # 邮箱
-            r'(user[\s]*id[\s=:"\']+)([0-9]+)',            # 用户ID
-        ]
-        
-        # 合并所有模式
-        all_patterns = (
-            session_patterns + 
-            api_patterns + 
-            db_patterns + 
-            encryption_patterns + 
-            user_patterns
-        )
-        
-        for pattern in all_patterns:
-            try:
-                self._sensitive_patterns.append(re.compile(pattern, re.IGNORECASE))
-            except re.error as e:
-                logging.warning(f"无效的正则表达式模式: {pattern}, 错误: {e}")
-    
     def filter(self, record: LogRecord) -> bool:
         """过滤日志记录中的敏感信息"""
         if hasattr(record, 'msg') and record.msg:
@@ -83,55 +96,81 @@ class SensitiveFilter(logging.Filter):
         if not message:
             return message
         
-        sanitized = message
+        # 先用子串查找预筛，大部分日志无需进入正则引擎
+        lowered = message.lower()
+        if not any(keyword in lowered for keyword in _PRESCREEN_KEYWORDS) and not (
+            '1' in lowered and any(prefix in lowered for prefix in _PRESCREEN_SESSION_PREFIXES)
+        ):
+            return message
         
-        for pattern in self._sensitive_patterns:
+        sanitized = message
+        total = 0
+        for pattern, replacement in _COMPILED_PATTERNS:
             try:
-                # 使用替换函数来保留前缀但隐藏敏感数据
-                sanitized = pattern.sub(
-                    lambda m: f"{m.group(1)}[REDACTED:{self._get_data_type(m.group(2))}]",
-                    sanitized
-                )
+                # 保留前缀但隐藏敏感数据
+                sanitized, count = pattern.subn(replacement, sanitized)
+                total += count
             except Exception as e:
-                # 如果正则替换出错，保持原消息
+                # 如果正则替换出错，保持当前结果
                 logging.debug(f"正则替换出错: {e}")
         
+        # 绝大多数消息不含敏感信息，直接返回原字符串
+        if total == 0:
+            return message
+        # 短消息驻留，重复出现的脱敏日志共享同一个字符串对象
+        if len(sanitized) < _INTERN_MAX_LENGTH:
+            return sys.intern(sanitized)
         return sanitized
     
     def _sanitize_args(self, args: Any) -> Any:
         """清理参数中的敏感信息"""
-        if isinstance(args, (tuple, list)):
-            return tuple(self._sanitize_arg(arg) for arg in args)
-        elif isinstance(args, dict):
-            return {k: self._sanitize_arg(v) for k, v in args.items()}
-        else:
-            return self._sanitize_arg(args)
+        return self._sanitize_arg(args)
+    
+    def _sanitize_sequence(self, args: Any) -> tuple:
+        """清理列表或元组中的每个参数"""
+        return tuple(self._sanitize_arg(arg) for arg in args)
+    
+    def _sanitize_mapping(self, args: Dict[Any, Any]) -> Dict[Any, Any]:
+        """清理字典中的每个值"""
+        return {k: self._sanitize_arg(v) for k, v in args.items()}
     
     def _sanitize_arg(self, arg: Any) -> Any:
-        """清理单个参数"""
-        if isinstance(arg, str):
-            return self._sanitize_message(arg)
-        elif isinstance(arg, (dict, list, tuple)):
-            return self._sanitize_args(arg)
-        else:
-            return arg
-    
-    def _get_data_type(self, data: str) -> str:
-        """根据数据特征判断数据类型"""
-        if len(data) >= 40 and re.match(r'^[A-Za-z0-9+/]+={0,2}$', data):
-            return "SESSION"
-        elif re.match(r'^[0-9]+:[A-Za-z0-9_-]{35}$', data):
-            return "BOT_TOKEN"
-        elif len(data) >= 32 and re.match(r'^[A-Za-z0-9]+$', data):
-            return "API_KEY"
-        elif re.match(r'^\+?[0-9]{10,15}$', data):
-            return "PHONE"
-        elif re.match(r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}$', data):
-            return "EMAIL"
-        elif re.match(r'^mongodb://', data):
-            return "DB_CONNECTION"
-        else:
-            return "SENSITIVE_DATA"
+        """清理单个参数
+        
+        按类型查表分派，数字、None 等无需处理的参数只需一次字典查找；
+        子类（如 pyrogram 的 Str）首次出现时按 MRO 解析并缓存。
+        """
+        cls = type(arg)
+        handler = _ARG_HANDLERS.get(cls, _UNRESOLVED)
+        if handler is _UNRESOLVED:
+            handler = _resolve_arg_handler(cls)
+        return arg if handler is None else handler(self, arg)
+
+
+# 基础类型 -> 清理方法
+_BASE_ARG_HANDLERS = {
+    str: SensitiveFilter._sanitize_message,
+    tuple: SensitiveFilter._sanitize_sequence,
+    list: SensitiveFilter._sanitize_sequence,
+    dict: SensitiveFilter._sanitize_mapping,
+}
+# 参数类型 -> 清理方法（None 表示原样返回），包含已解析过的子类
+_ARG_HANDLERS = dict(_BASE_ARG_HANDLERS)
+_UNRESOLVED = object()
+
+
+def _resolve_arg_handler(cls: type):
+    """沿 MRO 查找参数类型对应的清理方法并缓存结果"""
+    handler = next(
+        (_BASE_ARG_HANDLERS[base] for base in cls.__mro__ if base in _BASE_ARG_HANDLERS),
+        None
+    )
+    _ARG_HANDLERS[cls] = handler
+    return handler
+
+
+# 共享的默认过滤器实例
+_DEFAULT_FILTER = SensitiveFilter()
 
 
 def setup_sensitive_logging():
@@ -139,46 +178,61 @@ def setup_sensitive_logging():
     # 获取根日志器
     root_logger = logging.getLogger()
     
-    # 创建敏感信息过滤器
-    sensitive_filter = SensitiveFilter()
+    # 使用共享的敏感信息过滤器
+    sensitive_filter = _DEFAULT_FILTER
     
-    # 为所有处理器添加过滤器
+    # 只为处理器添加过滤器：处理器在级别检查通过后才执行过滤器，
+    # 被丢弃的记录不会被清理；不再在根日志器上重复过滤
     for handler in root_logger.handlers:
         handler.addFilter(sensitive_filter)
-    
-    # 为根日志器添加过滤器
-    root_logger.addFilter(sensitive_filter)
+
+
+# sanitize_dict 中视为敏感的键名片段
+_SENSITIVE_KEYS = (
+    'session', 'session_string', 'session_str',
+    'api_id', 'api_hash', 'bot_token', 'token',
+    'username', 'password', 'host', 'port',
+    'encryption_key', 'secret',
+    'phone', 'email', 'user_id'
+)
 
 
 def sanitize_dict(data: Dict[str, Any]) -> Dict[str, Any]:
-    """清理字典中的敏感信息"""
-    sensitive_keys = {
-        'session', 'session_string', 'session_str',
-        'api_id', 'api_hash', 'bot_token', 'token',
-        'username', 'password', 'host', 'port',
-        'encryption_key', 'secret',
-        'phone', 'email', 'user_id'
-    }
+    """清理字典中的敏感信息
     
+    使用显式栈迭代遍历嵌套字典，嵌套深度不受递归深度限制。
+    """
     sanitized = {}
+    stack = [(data, sanitized)]
     
-    for key, value in data.items():
-        if any(sensitive in key.lower() for sensitive in sensitive_keys):
-            sanitized[key] = f"[REDACTED:{key.upper()}]"
-        elif isinstance(value, dict):
-            sanitized[key] = sanitize_dict(value)
-        elif isinstance(value, (list, tuple)):
-            sanitized[key] = [sanitize_dict(item) if isinstance(item, dict) else 
-                            f"[REDACTED:LIST_ITEM]" if isinstance(item, str) and len(item) > 20 else item
-                            for item in value]
-        elif isinstance(value, str) and len(value) > 30:
-            # 对于长字符串，检查是否包含敏感信息
-            if any(pattern.search(value) for pattern in SensitiveFilter()._sensitive_patterns):
-                sanitized[key] = f"[REDACTED:LONG_STRING]"
+    while stack:
+        source, target = stack.pop()
+        for key, value in source.items():
+            if any(sensitive in key.lower() for sensitive in _SENSITIVE_KEYS):
+                target[key] = f"[REDACTED:{key.upper()}]"
+            elif isinstance(value, dict):
+                nested = target[key] = {}
+                stack.append((value, nested))
+            elif isinstance(value, (list, tuple)):
+                items = []
+                for item in value:
+                    if isinstance(item, dict):
+                        nested = {}
+                        stack.append((item, nested))
+                        items.append(nested)
+                    elif isinstance(item, str) and len(item) > 20:
+                        items.append("[REDACTED:LIST_ITEM]")
+                    else:
+                        items.append(item)
+                target[key] = items
+            elif isinstance(value, str) and len(value) > 30:
+                # 对于长字符串，检查是否包含敏感信息
+                if any(pattern.search(value) for pattern, _ in _COMPILED_PATTERNS):
+                    target[key] = "[REDACTED:LONG_STRING]"
+                else:
+                    target[key] = value
             else:
-                sanitized[key] = value
-        else:
-            sanitized[key] = value
+                target[key] = value
     
     return sanitized
 
@@ -188,9 +242,9 @@ def log_safely(message: str, *args, level: int = logging.INFO, **kwargs):
     logger = logging.getLogger(__name__)
     
     # 清理消息和参数
-    safe_message = SensitiveFilter()._sanitize_message(message)
-    safe_args = SensitiveFilter()._sanitize_args(args)
-    safe_kwargs = SensitiveFilter()._sanitize_args(kwargs)
+    safe_message = _DEFAULT_FILTER._sanitize_message(message)
+    safe_args = _DEFAULT_FILTER._sanitize_args(args)
+    safe_kwargs = _DEFAULT_FILTER._sanitize_args(kwargs)
     
     # 记录日志
     logger.log(level, safe_message, *safe_args, **safe_kwargs)
@@ -201,7 +255,7 @@ class SafeLogger:
     
     def __init__(self, name: str = None):
         self.logger = logging.getLogger(name)
-        self.filter = SensitiveFilter()
+        self.filter = _DEFAULT_FILTER
     
     def debug(self, msg, *args, **kwargs):
         safe_msg = self.filter._sanitize_message(msg)
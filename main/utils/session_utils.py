@@ -1,11 +1,21 @@
 """SESSION工具模块"""
 
 import base64
+import re
 import struct
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Pyrogram v2 SESSION 二进制格式，预编译避免每次解包时解析格式字符串
+_SESSION_STRUCT = struct.Struct(">BI?256sQ?")
+# 解码后的最小字节数：1+4+1+256+8+1 = 271
+_SESSION_DATA_LENGTH = _SESSION_STRUCT.size
+# 编码271字节至少需要的base64字符数（不含填充）
+_SESSION_MIN_LENGTH = (_SESSION_DATA_LENGTH * 4 + 2) // 3
+# base64 / urlsafe base64 字符集，末尾最多两个填充符
+_SESSION_ALPHABET = re.compile(r'[A-Za-z0-9+/_\-]*={0,2}')
+
 
 def validate_pyrogram_session(session_string: str) -> bool:
     """
@@ -20,6 +30,17 @@ def validate_pyrogram_session(session_string: str) -> bool:
     if not session_string:
         return False
     
+    # base64 解码会忽略空白字符（如换行折行的SESSION），检查前先去除
+    session_string = ''.join(session_string.split())
+    
+    # 先做长度和字符集检查，明显无效的字符串无需解码和抛出异常
+    if len(session_string) < _SESSION_MIN_LENGTH:
+        logger.warning(f"SESSION长度不足: {len(session_string)} 字符，需要至少{_SESSION_MIN_LENGTH}字符")
+        return False
+    if not _SESSION_ALPHABET.fullmatch(session_string):
+        logger.warning("SESSION包含无效字符")
+        return False
+    
     try:
         # 尝试解码SESSION字符串
         padded_session = session_string + "=" * (-len(session_string) % 4)
@@ -34,8 +55,8 @@ def validate_pyrogram_session(session_string: str) -> bool:
         # Q: user_id (8字节)
         # ?: is_bot (1字节)
         # 总计: 1+4+1+256+8+1 = 271字节
-        if len(decoded_data) >= 271:
-            struct.unpack(">BI?256sQ?", decoded_data[:271])
+        if len(decoded_data) >= _SESSION_DATA_LENGTH:
+            _SESSION_STRUCT.unpack_from(decoded_data)
             return True
         else:
             logger.warning(f"SESSION数据长度不足: {len(decoded_data)} 字节，需要至少271字节")
@@ -87,8 +108,8 @@ def get_session_info(session_string: str) -> dict:
         padded_session = session_string + "=" * (-len(session_string) % 4)
         decoded_data = base64.urlsafe_b64decode(padded_session)
         
-        if len(decoded_data) >= 271:
-            dc_id, api_id, test_mode, _, user_id, is_bot = struct.unpack(">BI?256sQ?", decoded_data[:271])
+        if len(decoded_data) >= _SESSION_DATA_LENGTH:
+            dc_id, api_id, test_mode, _, user_id, is_bot = _SESSION_STRUCT.unpack_from(decoded_data)
             return {
                 "dc_id": dc_id,
                 "api_id": api_id,
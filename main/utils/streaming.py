@@ -1,9 +1,9 @@
 """流式文件处理模块"""
 import os
 import asyncio
+import shutil
 import logging
 from typing import AsyncGenerator, Optional
-from .file_manager import file_manager
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +17,13 @@ class StreamProcessor:
     async def stream_file(self, file_path: str) -> AsyncGenerator[bytes, None]:
         """流式读取文件"""
         try:
-            file_size = file_manager.get_file_size(file_path)
-            logger.debug(f"开始流式传输文件: {file_path} ({file_size} bytes)")
-            
+            # 磁盘读取在线程池中执行，避免阻塞事件循环
             with open(file_path, 'rb') as f:
+                # 通过已打开的句柄获取大小，无需再按路径 stat 一次
+                logger.debug(f"开始流式传输文件: {file_path} ({os.fstat(f.fileno()).st_size} bytes)")
+                
                 while True:
-                    chunk = f.read(self.chunk_size)
+                    chunk = await asyncio.to_thread(f.read, self.chunk_size)
                     if not chunk:
                         break
                     yield chunk
@@ -39,7 +40,7 @@ class StreamProcessor:
             total_bytes = 0
             with open(output_path, 'wb') as f:
                 async for chunk in stream:
-                    f.write(chunk)
+                    await asyncio.to_thread(f.write, chunk)
                     total_bytes += len(chunk)
                     
             logger.debug(f"流写入完成: {output_path} ({total_bytes} bytes)")
@@ -51,12 +52,10 @@ class StreamProcessor:
     async def copy_file_streaming(self, src: str, dst: str) -> int:
         """流式复制文件"""
         try:
-            # 使用流式传输复制文件
-            async def file_stream():
-                async for chunk in self.stream_file(src):
-                    yield chunk
-            
-            bytes_copied = await self.write_stream_to_file(file_stream(), dst)
+            # shutil.copyfile 在内核中完成拷贝（copy_file_range/sendfile），
+            # 数据无需经过 Python 字节对象，放到线程池中避免阻塞事件循环
+            await asyncio.to_thread(shutil.copyfile, src, dst)
+            bytes_copied = os.stat(dst).st_size
             logger.debug(f"流式复制完成: {src} -> {dst} ({bytes_copied} bytes)")
             return bytes_copied
         except Exception as e:
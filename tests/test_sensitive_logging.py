@@ -0,0 +1,34 @@
+"""敏感信息日志过滤的回归测试"""
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+# 直接按路径加载模块：导入 main 包会初始化客户端和数据库连接
+_MODULE_PATH = Path(__file__).resolve().parent.parent / "main" / "utils" / "sensitive_logging.py"
+_spec = importlib.util.spec_from_file_location("sensitive_logging", _MODULE_PATH)
+sensitive_logging = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sensitive_logging)
+
+_SESSION = "A" * 20 + "b" * 24
+_KEY = "k" * 44
+
+
+@pytest.mark.parametrize("message, expected", [
+    # 前一个模式的匹配区域不能吞掉后一个模式需要的文本
+    ("user id: 1 " + _SESSION, "user id: [REDACTED:SENSITIVE_DATA] [REDACTED:SESSION]"),
+    ("port: 1 " + _SESSION, "port: [REDACTED:SENSITIVE_DATA] [REDACTED:SESSION]"),
+    ("password:token " + _KEY, "password:[REDACTED:SENSITIVE_DATA] [REDACTED:API_KEY]"),
+    ("password=hunter2", "password=[REDACTED:SENSITIVE_DATA]"),
+    ("hello world", "hello world"),
+])
+def test_sanitize_message(message, expected):
+    assert sensitive_logging.SensitiveFilter()._sanitize_message(message) == expected
+
+
+def test_sanitize_str_subclass_arg():
+    class Str(str):
+        pass
+
+    sanitized = sensitive_logging.SensitiveFilter()._sanitize_args((Str("session=" + _SESSION),))
+    assert sanitized == ("session=[REDACTED:SESSION]",)